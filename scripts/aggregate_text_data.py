@@ -0,0 +1,285 @@
+# ===================================================================
+# Text Data Aggregator
+# ===================================================================
+# Replaces aggregate_text_data.R. Reads the coded snippets of both
+# leagues (data/raw/*_raw_text_data.csv) in one pass and counts, per
+# article, the snippet types and the C (comeback team) / O (opponent)
+# codes of every narrative code column. It writes the R script's
+# per-league nba_aggregated_data.csv and wnba_aggregated_data.csv,
+# bothleague_aggregated_text_data.csv and the modelling table
+# nba_updated_comeback_data.csv (snake_case columns, psychological and
+# aftermath scores, snippet_count and the outlet grouped into the
+# league's top 3 or "Other").
+#
+# The cleanup that used to be done by hand after the R script is part
+# of the aggregation of both leagues: markdown-wrapped article links
+# are unwrapped, ESPN links filed under the wrong league are merged
+# with their article, each game gets one team spelling and its game
+# date, and outlet names come from OUTLET_ALIASES.
+#
+# Aggregation is incremental. A hash of the snippets of every article
+# link is kept with its counts in data/store/text_articles.csv, and on
+# the next run only the links whose snippets changed are counted
+# again. The tables go to data/processed/aggregated/ unless
+# --overwrite asks to replace the curated files in data/processed.
+# --check compares the result with the curated files and writes
+# nothing.
+#
+# Usage: python aggregate_text_data.py [--full] [--check] [--overwrite]
+# ===================================================================
+
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- Configuration, change as needed ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+RAW_TEXT_FILES = [os.path.join(DATA_DIR, "raw", "nba_raw_text_data.csv"),
+                  os.path.join(DATA_DIR, "raw", "wnba_raw_text_data.csv")]
+PROCESSED_DIR = os.path.join(DATA_DIR, "processed") # Curated tables, compared by --check, replaced by --overwrite
+OUTPUT_DIR = os.path.join(PROCESSED_DIR, "aggregated") # Where the tables go by default
+AGGREGATED_NAME = "bothleague_aggregated_text_data.csv"
+MODEL_NAME = "nba_updated_comeback_data.csv"
+LEAGUE_NAMES = {"NBA": "nba_aggregated_data.csv", "WNBA": "wnba_aggregated_data.csv"}
+STATE_FILE = os.path.join(DATA_DIR, "store", "text_articles.csv")
+TOP_OUTLETS = 3 # Outlets per league kept by name in media_outlet_grouped, the rest become "Other"
+
+CODE_COLUMNS = [
+    "ATT. Ind. Resilience", "ATT. Self-Efficacy", "ATT. Team Efficacy/Cohesion",
+    "ATT. Verbal Persuasion", "ATT. Emotional Reg.",
+    "AFT. Momentum Lang.", "AFT. Draining Lang", "AFT. Perf. Outcome Lang.", "Gendered Lang.",
+]
+SNIPPET_TYPES = {"Author Written": "authorwritten", "Player Quotes": "playerquote", "Coach Quotes": "coachquote"}
+GAME_COLUMNS = ["Game ID", "League", "Comeback Team (CBT)", "Opponent Team (OPP)", "Game Date"]
+ARTICLE_COLUMNS = ["Media Outlet", "Headline"]
+
+# Column names that differ between the raw files.
+COLUMN_FIXES = {
+    "ATT. Ind. Resillence": "ATT. Ind. Resilience",
+    "ATT. Ind. Resillience": "ATT. Ind. Resilience",
+    "Publication Date": "Game Date",
+}
+OUTLET_ALIASES = {"nba.com": "NBA", "dream.wnba.com": "WNBA"}
+
+MARKDOWN_LINK_PATTERN = r"^\[(?P<url>[^\]]+)\]\([^)]*\)$"
+DATE_FORMAT = "%m-%d-%Y"
+
+
+def count_columns():
+    """Count columns of the aggregated table, in the order of bothleague_aggregated_text_data.csv."""
+    return list(SNIPPET_TYPES) + [f"{code}- {column}" for column in CODE_COLUMNS for code in ("C", "O")]
+
+
+def load_snippets(paths=RAW_TEXT_FILES):
+    """
+    Reads the coded snippets of every league into one table with the R script's column names,
+    plus `Filed URL` (the article link as written in the file, which the per-league tables are
+    grouped by) and `Row` (position over all files) so "first" always means first in the files.
+    """
+    frames = [pd.read_csv(path, dtype=str).rename(columns=COLUMN_FIXES) for path in paths]
+    snippets = pd.concat(frames, ignore_index=True)
+    for column in CODE_COLUMNS:
+        if column not in snippets:
+            snippets[column] = pd.NA
+    snippets["Filed URL"] = snippets["URL of Article"].str.strip()
+    snippets["URL of Article"] = clean_article_urls(snippets["Filed URL"], snippets["League"])
+    snippets["Row"] = np.arange(len(snippets))
+    return snippets
+
+
+def clean_article_urls(urls, leagues):
+    """Unwraps [url](url) markdown links and moves ESPN /nba/ links of WNBA games to /wnba/."""
+    urls = urls.str.strip().str.replace(MARKDOWN_LINK_PATTERN, r"\g<url>", regex=True)
+    misfiled = (leagues == "WNBA").to_numpy() & urls.str.contains("espn.com/nba/", regex=False).to_numpy()
+    return urls.where(~misfiled, urls.str.replace("espn.com/nba/", "espn.com/wnba/", regex=False))
+
+
+def article_hashes(snippets):
+    """One hash per filed article link over all of its snippet rows, in file order."""
+    columns = [column for column in snippets.columns if column != "Row"]
+    # Mixing in each row's position within its article makes reordered snippets count as a change.
+    position = snippets.groupby("Filed URL", sort=False).cumcount().to_numpy(np.uint64)
+    rows = pd.util.hash_pandas_object(snippets[columns], index=False).to_numpy()
+    mixed = rows ^ (position * np.uint64(0x9E3779B97F4A7C15))
+    return pd.Series(mixed, index=snippets["Filed URL"].to_numpy()).groupby(level=0).sum()
+
+
+def aggregate_articles(snippets):
+    """
+    Counts the snippet types and C/O codes of each article link, as filed, in one groupby.
+
+    Returns:
+        pd.DataFrame: One row per filed URL with the cleaned URL of Article, the first Game ID,
+                      League, teams, date, outlet and headline, `Row` (the link's first snippet)
+                      and the counts.
+    """
+    counts = pd.DataFrame({name: (snippets["Snippet Type"] == snippet_type).to_numpy()
+                           for name, snippet_type in SNIPPET_TYPES.items()})
+    for column in CODE_COLUMNS:
+        values = snippets[column].to_numpy()
+        counts[f"C- {column}"] = values == "C"
+        counts[f"O- {column}"] = values == "O"
+    counts["Filed URL"] = snippets["Filed URL"].to_numpy()
+    totals = counts.groupby("Filed URL").sum().astype(np.int64)
+
+    ordered = snippets.sort_values("Row")
+    firsts = ordered.groupby("Filed URL")[["Row", "URL of Article"] + GAME_COLUMNS + ARTICLE_COLUMNS].first()
+    return firsts.join(totals).reset_index()
+
+
+def aggregate_incremental(snippets, state_path=STATE_FILE, full=False, save=True):
+    """
+    Aggregates the snippets, counting again only article links whose snippets changed since
+    the last run. Links no longer in the snippets are dropped. Saves the new state unless
+    `save` is False.
+
+    Returns:
+        tuple: (articles, recounted) where recounted is the number of links counted this run.
+    """
+    hashes = article_hashes(snippets).astype(str).rename("Snippet_Hash")
+    previous = None
+    if not full and os.path.exists(state_path):
+        previous = pd.read_csv(state_path, dtype={"Snippet_Hash": str, **{c: str for c in GAME_COLUMNS}})
+        if "Filed URL" not in previous:
+            previous = None # State written before article links were kept as filed, count everything
+        else:
+            previous = previous[previous["Filed URL"].map(hashes).to_numpy() == previous["Snippet_Hash"].to_numpy()]
+            previous = previous.drop(columns="Row")
+
+    changed = hashes.index if previous is None else hashes.index.difference(previous["Filed URL"])
+    recounted = aggregate_articles(snippets[snippets["Filed URL"].isin(changed)])
+    recounted["Snippet_Hash"] = recounted["Filed URL"].map(hashes)
+    if previous is not None:
+        # Unchanged links keep their counts but take their position from this run's files.
+        first_rows = snippets.groupby("Filed URL")["Row"].min()
+        previous.insert(1, "Row", previous["Filed URL"].map(first_rows).to_numpy())
+        articles = pd.concat([previous[recounted.columns], recounted], ignore_index=True)
+    else:
+        articles = recounted
+
+    if save:
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        articles.to_csv(state_path, index=False)
+    return articles.drop(columns="Snippet_Hash"), len(recounted)
+
+
+def league_tables(articles):
+    """
+    Builds the R script's per-league tables (nba_aggregated_data.csv and wnba_aggregated_data.csv):
+    one row per article link as filed, sorted by it, without any of the cleanup.
+
+    Returns:
+        dict: League -> table in the layout of bothleague_aggregated_text_data.csv.
+    """
+    columns = GAME_COLUMNS + ["Media Outlet", "URL of Article", "Headline"] + count_columns()
+    tables = {}
+    for league, table in articles.groupby("League"):
+        table = table.drop(columns="URL of Article").rename(columns={"Filed URL": "URL of Article"})
+        tables[league] = table.sort_values("URL of Article")[columns].reset_index(drop=True)
+    return tables
+
+
+def finalize_articles(articles):
+    """
+    Merges the links of each article, applies the game- and outlet-level cleanup and returns the
+    table in the layout of bothleague_aggregated_text_data.csv, sorted by game and then by the
+    article's first link as filed, like the curated file.
+
+    Every article of a game takes the league and team names of the game's first snippet and the
+    earliest date of the game (the NBA files record each article's publication date, which can
+    be the day after the game).
+    """
+    articles = articles.sort_values("Row", kind="stable")
+    links = articles.groupby("URL of Article", sort=False)
+    articles = links[["Row", "Filed URL"] + GAME_COLUMNS + ARTICLE_COLUMNS].first().join(links[count_columns()].sum())
+    articles = articles.reset_index()
+    games = articles.groupby("Game ID", sort=False)
+    for column in ["League", "Comeback Team (CBT)", "Opponent Team (OPP)"]:
+        articles[column] = games[column].transform("first")
+    dates = pd.to_datetime(articles["Game Date"], format=DATE_FORMAT)
+    articles["Game Date"] = dates.groupby(articles["Game ID"]).transform("min").dt.strftime(DATE_FORMAT)
+    articles["Media Outlet"] = articles["Media Outlet"].replace(OUTLET_ALIASES)
+
+    columns = GAME_COLUMNS + ["Media Outlet", "URL of Article", "Headline"] + count_columns()
+    return articles.sort_values(["Game ID", "Filed URL"])[columns].reset_index(drop=True)
+
+
+def snake_case(name):
+    """'C- ATT. Team Efficacy/Cohesion' -> 'c_att_team_efficacy_cohesion', like janitor::clean_names()."""
+    return re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_")
+
+
+def model_table(aggregated):
+    """
+    Builds the nba_updated_comeback_data.csv table from the aggregated articles: snake_case
+    columns, the comeback team (cbt_) and opponent (opp_) psychological (ATT.) and aftermath
+    (AFT.) scores, snippet_count (the sum of those four) and media_outlet_grouped.
+    """
+    table = aggregated.rename(columns=snake_case)
+    for score, prefix in (("psych", "att"), ("after", "aft")):
+        for side, code in (("cbt", "c"), ("opp", "o")):
+            columns = [column for column in table.columns if column.startswith(f"{code}_{prefix}_")]
+            table[f"{side}_{score}_score"] = table[columns].sum(axis=1)
+    table["snippet_count"] = table[["cbt_psych_score", "opp_psych_score",
+                                    "cbt_after_score", "opp_after_score"]].sum(axis=1)
+
+    outlet_counts = table.groupby(["league", "media_outlet"]).size().rename("articles").reset_index()
+    outlet_counts = outlet_counts.sort_values(["league", "articles"], ascending=[True, False], kind="stable")
+    top = outlet_counts.groupby("league").head(TOP_OUTLETS)
+    is_top = pd.MultiIndex.from_frame(table[["league", "media_outlet"]]).isin(
+        pd.MultiIndex.from_frame(top[["league", "media_outlet"]]))
+    table["media_outlet_grouped"] = np.where(is_top, table["media_outlet"], "Other")
+    return table
+
+
+def compare_tables(result, expected, key):
+    """Lists the cells where `result` differs from `expected`, matching rows on `key`. Returns the count."""
+    result = result.set_index(key)
+    expected = expected.set_index(key)
+    differences = 0
+    for url in expected.index.symmetric_difference(result.index):
+        print(f"  only in {'the existing file' if url in expected.index else 'the new table'}: {url}")
+        differences += 1
+    shared = expected.index.intersection(result.index)
+    for column in expected.columns:
+        if column not in result:
+            print(f"  missing column {column}")
+            differences += 1
+            continue
+        new = result.loc[shared, column].astype(str)
+        old = expected.loc[shared, column].astype(str)
+        for url in shared[(new != old).to_numpy()]:
+            print(f"  {column}: {old[url]} -> {new[url]}  ({url})")
+            differences += 1
+    return differences
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate the coded article snippets of both leagues.")
+    parser.add_argument("--full", action="store_true", help="Count every article again, ignoring the saved state")
+    parser.add_argument("--check", action="store_true", help="Compare with the curated files in data/processed, write nothing")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help=f"Folder for the tables (default: {OUTPUT_DIR})")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the curated files in data/processed instead")
+    args = parser.parse_args()
+
+    snippets = load_snippets()
+    articles, recounted = aggregate_incremental(snippets, full=args.full, save=not args.check)
+    print(f"Counted {recounted} of {len(articles)} article links ({len(snippets)} snippets).")
+    aggregated = finalize_articles(articles)
+    tables = {LEAGUE_NAMES[league]: (table, "URL of Article") for league, table in league_tables(articles).items()}
+    tables[AGGREGATED_NAME] = (aggregated, "URL of Article")
+    tables[MODEL_NAME] = (model_table(aggregated), "url_of_article")
+
+    if args.check:
+        for name, (table, key) in tables.items():
+            differences = compare_tables(table, pd.read_csv(os.path.join(PROCESSED_DIR, name), dtype=str), key)
+            print(f"{name}: {differences or 'no'} differing cells")
+    else:
+        output_dir = PROCESSED_DIR if args.overwrite else args.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        for name, (table, key) in tables.items():
+            table.to_csv(os.path.join(output_dir, name), index=False)
+        print(f"Wrote {len(aggregated)} articles to {', '.join(tables)} in {output_dir}")
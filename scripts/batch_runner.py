@@ -0,0 +1,198 @@
+# ===================================================================
+# Multi-Season Batch Runner
+# ===================================================================
+# Scrapes any mix of leagues and seasons in one unattended run,
+# instead of editing SEASON_YEAR/LEAGUE in a scraper and relaunching
+# it once per season. Every league/season job discovers and scrapes
+# concurrently, but all of them fetch through one shared Fetcher, so
+# a single per-host budget caps the total request rate against
+# basketball-reference.com. Progress for every job is printed while
+# the run goes, and stage timings are written to METRICS_FILE at the
+# end (see scrape_metrics.py). Output files match the ones the
+# scrapers write, so a batch run and a scraper run can resume each
+# other.
+#
+# Usage: python batch_runner.py --leagues NBA WNBA --seasons 2023-2025
+# ===================================================================
+
+import argparse
+import asyncio
+import importlib
+import time
+
+import pandas as pd
+
+from checkpoint_store import CheckpointStore
+from comeback_analysis import find_comeback_candidates, parse_int_range
+from fetch_engine import Fetcher, MAX_CONCURRENT_REQUESTS, REQUESTS_PER_MINUTE, scrape_games_async
+from html_cache import HtmlCache
+from retry_queue import RetryQueue
+from schedule import discover_game_urls
+from schedule_index import ScheduleIndex
+from scrape_metrics import METRICS
+
+# --- Configuration, change as needed ---
+# Each league's comeback threshold is the COMEBACK_THRESHOLD of its scraper, so both runs find the same games.
+SCRAPER_MODULES = {"NBA": "nba_scraper", "WNBA": "wnba_scraper"}
+PROGRESS_EVERY = 30 # Seconds between progress reports
+DRIVER_POOL_SIZE = 4 # Chrome workers used afterwards for pages that need JS
+METRICS_FILE = "batch_scrape_metrics" # Stage timings of the run go to this .json and .prom
+
+
+def output_filenames(league, season):
+    """The raw data CSV and checkpoint store names the scrapers use for a league/season."""
+    stem = f"{league.lower()}_raw_data_{season}" + ("_bball_ref" if league == "NBA" else "")
+    return f"{stem}.csv", f"{stem}.sqlite"
+
+
+class ScrapeJob:
+    """One league/season to scrape, plus the progress counters the reporter prints."""
+
+    def __init__(self, league, season):
+        self.league = league
+        self.season = season
+        self.state = "waiting"
+        self.discovered = 0
+        self.scraped = 0
+        self.needs_browser = []
+        self.failed_urls = []
+        self.started = time.monotonic()
+
+    def __str__(self):
+        percent = f"{self.scraped / self.discovered:6.1%}" if self.discovered else "     -"
+        return (f"{self.league:>4} {self.season}  {self.state:<12} {self.scraped:>5}/{self.discovered:<5} {percent}"
+                f"  browser queue {len(self.needs_browser):>4}  {time.monotonic() - self.started:7.0f}s")
+
+
+async def run_job(job, fetcher, index, use_browser=True):
+    """
+    Discovers and scrapes one league/season over HTTP, committing every game to its checkpoint store.
+    Only the schedule pages the index does not already have as final are fetched.
+    """
+    raw_data_filename, checkpoint_filename = output_filenames(job.league, job.season)
+
+    job.state = "discovering"
+    with METRICS.stage("discover"):
+        all_game_urls = await discover_game_urls(job.league, job.season, fetcher, index)
+    job.discovered = len(all_game_urls)
+
+    store = CheckpointStore(checkpoint_filename)
+    retry_queue = RetryQueue(checkpoint_filename)
+    try:
+        store.import_csv(raw_data_filename)
+        scraped_urls = store.scraped_urls()
+        held_back = retry_queue.held_back()
+        urls_to_process = [url for url in all_game_urls if url not in scraped_urls and url not in held_back]
+        job.scraped = sum(url in scraped_urls for url in all_game_urls)
+
+        def save_game(game_info):
+            store.add(game_info)
+            retry_queue.resolve(game_info['Game_URL'])
+            job.scraped += 1
+
+        job.state = "scraping"
+        _, job.needs_browser = await scrape_games_async(urls_to_process, job.league, on_game=save_game,
+                                                        fetcher=fetcher, retry_queue=retry_queue,
+                                                        browser_fallback=use_browser)
+        job.state = "needs browser" if job.needs_browser else "fetched"
+    finally:
+        store.close()
+        retry_queue.close()
+
+
+async def report_progress(jobs):
+    """Prints one status line per job every PROGRESS_EVERY seconds until cancelled."""
+    while True:
+        await asyncio.sleep(PROGRESS_EVERY)
+        print(f"\n--- Batch progress ({sum(job.scraped for job in jobs)} games scraped) ---")
+        for job in jobs:
+            print(job)
+
+
+async def run_http_phase(jobs, max_concurrency, per_minute, cache, base_url=None, use_browser=True):
+    """Runs every job's discovery and HTTP scraping concurrently through one shared Fetcher."""
+    reporter = asyncio.create_task(report_progress(jobs))
+    index = ScheduleIndex()
+    try:
+        async with Fetcher(max_concurrency=max_concurrency, per_minute=per_minute, cache=cache,
+                           base_url=base_url) as fetcher:
+            results = await asyncio.gather(*(run_job(job, fetcher, index, use_browser) for job in jobs),
+                                           return_exceptions=True)
+    finally:
+        reporter.cancel()
+        index.close()
+    for job, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            job.state = "failed"
+            print(f"---! {job.league} {job.season} failed: {result}")
+
+
+def finish_job(job, use_browser, cache):
+    """Scrapes the job's JS-only pages with the driver pool, writes its CSV and its comeback candidates."""
+    raw_data_filename, checkpoint_filename = output_filenames(job.league, job.season)
+    store = CheckpointStore(checkpoint_filename)
+    retry_queue = RetryQueue(checkpoint_filename)
+    try:
+        if job.needs_browser and use_browser:
+            from driver_pool import scrape_with_pool # Only needs Selenium when there is something to load
+
+            def save_game(game_info):
+                store.add(game_info)
+                retry_queue.resolve(game_info['Game_URL'])
+                job.scraped += 1
+
+            job.state = "browser"
+            _, job.failed_urls = scrape_with_pool(job.needs_browser, job.league, on_game=save_game,
+                                                  workers=DRIVER_POOL_SIZE, cache_dir=cache.cache_dir,
+                                                  on_failure=retry_queue.record)
+        else:
+            job.failed_urls = list(job.needs_browser)
+        queued = len(retry_queue)
+
+        if not len(store):
+            job.state = "no games"
+            print(f"{job.league} {job.season}: no games were scraped, so no data file or comeback candidates "
+                  f"were written ({len(job.failed_urls)} failed, {queued} in the retry queue).")
+            return
+        store.export_csv(raw_data_filename)
+    finally:
+        store.close()
+        retry_queue.close()
+
+    full_df = pd.read_csv(raw_data_filename).drop_duplicates(subset=['Game_URL'], keep='last')
+    # The scraper modules import Selenium, so they are only loaded once a job has games to analyze.
+    threshold = importlib.import_module(SCRAPER_MODULES[job.league]).COMEBACK_THRESHOLD
+    comebacks = find_comeback_candidates(full_df, threshold)
+    if not comebacks.empty:
+        comebacks.to_csv(f"{job.league.lower()}_COMEBACK_CANDIDATES_{job.season}.csv", index=False)
+    job.state = "done"
+    print(f"{job.league} {job.season}: {len(full_df)} games, {len(comebacks)} comeback candidates, "
+          f"{queued} in the retry queue.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scrape several leagues and seasons under one request budget.")
+    parser.add_argument("--leagues", nargs='+', default=["NBA", "WNBA"], choices=["NBA", "WNBA"])
+    parser.add_argument("--seasons", required=True, help="Range like 2023-2025 or a list like 2023,2025")
+    parser.add_argument("--per-minute", type=float, default=REQUESTS_PER_MINUTE,
+                        help="Total requests per minute to basketball-reference.com across all jobs")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--no-browser", action="store_true", help="Skip the Chrome fallback for JS-only pages")
+    parser.add_argument("--base-url", help="Send requests to another host instead, e.g. the local stub site")
+    args = parser.parse_args()
+
+    jobs = [ScrapeJob(league, season) for league in args.leagues for season in parse_int_range(args.seasons)]
+    print(f"--- Starting {len(jobs)} job(s) at up to {args.per_minute:g} requests/min ---")
+    cache = HtmlCache()
+
+    asyncio.run(run_http_phase(jobs, args.concurrency, args.per_minute, cache, args.base_url, not args.no_browser))
+    for job in jobs:
+        if job.state != "failed":
+            finish_job(job, not args.no_browser, cache)
+
+    print("\n--- Batch complete ---")
+    for job in jobs:
+        print(job)
+    metrics_files = METRICS.write(METRICS_FILE)
+    print(METRICS.summary())
+    print(f"--- Wrote {' and '.join(metrics_files)}. ---")
@@ -0,0 +1,98 @@
+# ===================================================================
+# Box Score Parser Benchmark
+# ===================================================================
+# Times the single-pass parser in box_score.py against the old
+# approach (one BeautifulSoup parse of the line score wrapper, a
+# second one of the whole page for the date, and a .find() per
+# quarter cell) over a folder of saved box-score pages, and checks
+# that both produce the same scores.
+#
+# Usage: python bench_box_score.py <saved_pages_folder> [repeats]
+# ===================================================================
+
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup, Comment
+
+from box_score import parse_box_score
+
+LEGACY_IDS = {"NBA": ("all_line_score", "line_score"), "WNBA": ("all_line-score", "line-score")}
+
+
+def parse_box_score_legacy(html, league, url):
+    """The per-game parsing the scrapers did before box_score.py, kept here as the baseline."""
+    wrapper_id, table_id = LEGACY_IDS[league]
+    wrapper_soup = BeautifulSoup(html, 'html.parser')
+    comment_html = str(wrapper_soup.find(id=wrapper_id))
+    comment_soup = BeautifulSoup(comment_html, 'html.parser')
+    line_score_table = comment_soup.find('table', id=table_id)
+    if line_score_table is None:
+        # Static pages keep the table in a comment, the browser would have uncommented it for us.
+        comment = comment_soup.find(string=lambda text: isinstance(text, Comment) and table_id in text)
+        line_score_table = BeautifulSoup(comment, 'html.parser').find('table', id=table_id)
+
+    rows = line_score_table.select("tbody tr")
+    teams = [th.text.strip() for th in line_score_table.select("tbody th a")]
+    away_row, home_row = rows[0], rows[1]
+    away_q1 = int(away_row.find('td', {'data-stat': '1'}).text)
+    away_q2 = int(away_row.find('td', {'data-stat': '2'}).text)
+    away_final = int(away_row.find('td', {'data-stat': 'T'}).text)
+    home_q1 = int(home_row.find('td', {'data-stat': '1'}).text)
+    home_q2 = int(home_row.find('td', {'data-stat': '2'}).text)
+    home_final = int(home_row.find('td', {'data-stat': 'T'}).text)
+
+    main_soup = BeautifulSoup(html, 'html.parser')
+    game_date = main_soup.select_one(".scorebox_meta div").text.strip()
+
+    return {
+        "Game_Date": game_date, "Home_Team": teams[1], "Away_Team": teams[0],
+        "Halftime_Score_Home": home_q1 + home_q2, "Halftime_Score_Away": away_q1 + away_q2,
+        "Final_Score_Home": home_final, "Final_Score_Away": away_final, "Game_URL": url
+    }
+
+
+def load_pages(root):
+    """Reads every saved box-score page under `root`, returning (league, path, html) tuples."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(root, "**", "boxscores", "*.html"), recursive=True)):
+        league = "WNBA" if f"{os.sep}wnba{os.sep}" in path else "NBA"
+        with open(path, encoding='utf-8') as f:
+            pages.append((league, path, f.read()))
+    return pages
+
+
+def time_parser(parser, pages, repeats):
+    """Returns the best per-page parse time in milliseconds over `repeats` runs, plus the last results."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [parser(html, league, path) for league, path, html in pages]
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000, results
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pages = load_pages(root)
+    if not pages:
+        print(f"No saved box-score pages found under '{root}'.")
+        sys.exit(1)
+
+    legacy_ms, legacy_rows = time_parser(parse_box_score_legacy, pages, repeats)
+    fast_ms, fast_rows = time_parser(parse_box_score, pages, repeats)
+
+    score_columns = ["Home_Team", "Away_Team", "Halftime_Score_Home", "Halftime_Score_Away",
+                     "Final_Score_Home", "Final_Score_Away"]
+    mismatches = [old["Game_URL"] for old, new in zip(legacy_rows, fast_rows)
+                  if any(old[column] != new[column] for column in score_columns)]
+
+    print(f"--- Parsed {len(pages)} pages, best of {repeats} runs ---")
+    print(f"BeautifulSoup (two passes): {legacy_ms:8.2f} ms/page")
+    print(f"lxml single pass:           {fast_ms:8.2f} ms/page")
+    print(f"Speed-up: {legacy_ms / fast_ms:.1f}x")
+    if mismatches:
+        print(f"WARNING: {len(mismatches)} pages parsed differently, e.g. {mismatches[0]}")
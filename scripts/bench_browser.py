@@ -0,0 +1,83 @@
+# ===================================================================
+# Browser Page-Load Benchmark
+# ===================================================================
+# Loads the same saved box-score pages from the local stub site in a
+# headless Chrome driver, first in the full mode (every subresource,
+# driver.page_source) and then in lean mode (lean_browser.py), and
+# reports the wall time per game and the memory of the driver after
+# the run. The polite sleep between pages is turned off, so only
+# loading, extraction and parsing are timed. Memory is Chrome's JS
+# heap from the DevTools protocol, plus the resident size of the
+# whole Chrome process tree when psutil is installed.
+#
+# Usage: python bench_browser.py <saved_pages_folder> [--league NBA] [--games 20]
+# ===================================================================
+
+import argparse
+import importlib
+import time
+
+from driver_pool import SCRAPER_MODULES
+from fetch_engine import rewrite_url, saved_box_score_urls
+from rate_limiter import AdaptiveDelay
+from stub_server import start_stub_server
+
+
+def driver_memory_mb(driver):
+    """(JS heap MB, resident MB of chromedriver and every Chrome process it started, or None without psutil)."""
+    driver.execute_cdp_cmd("Performance.enable", {})
+    metrics = {metric["name"]: metric["value"] for metric in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+    heap = metrics.get("JSHeapUsedSize", 0) / 1024 ** 2
+    try:
+        import psutil
+    except ImportError:
+        return heap, None
+    root = psutil.Process(driver.service.process.pid)
+    processes = [root] + root.children(recursive=True)
+    return heap, sum(process.memory_info().rss for process in processes) / 1024 ** 2
+
+
+def run_mode(scraper, urls, league, lean):
+    """Scrapes `urls` with one fresh driver. Returns (seconds per game, games parsed, memory)."""
+    driver = scraper.setup_driver(headless=True, lean=lean)
+    try:
+        parsed = 0
+        start = time.perf_counter()
+        for url in urls:
+            try:
+                scraper.scrape_game_with_driver(driver, url, lean=lean)
+                parsed += 1
+            except Exception as e:
+                print(f"---! {url}: {e!r}")
+        elapsed = time.perf_counter() - start
+        return elapsed / len(urls), parsed, driver_memory_mb(driver)
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare full and lean browser page loads against the stub site.")
+    parser.add_argument("pages", help="Folder of saved pages laid out like the site (e.g. pages/boxscores/*.html)")
+    parser.add_argument("--league", default="NBA", choices=["NBA", "WNBA"])
+    parser.add_argument("--games", type=int, default=20, help="Pages loaded per mode")
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial server delay in seconds")
+    args = parser.parse_args()
+
+    scraper = importlib.import_module(SCRAPER_MODULES[args.league])
+    scraper.pacer = AdaptiveDelay(0, 0) # No polite sleep against the local site
+    server, base_url = start_stub_server(args.pages, latency=args.latency)
+    try:
+        urls = [rewrite_url(url, base_url) for url in saved_box_score_urls(args.pages, args.league)[:args.games]]
+        if not urls:
+            print(f"No saved {args.league} box-score pages found under '{args.pages}'.")
+        else:
+            results = {mode: run_mode(scraper, urls, args.league, mode == "lean") for mode in ("full", "lean")}
+            print(f"--- {len(urls)} {args.league} games per mode ---")
+            for mode, (per_game, parsed, (heap, rss)) in results.items():
+                rss_text = f", {rss:7.1f} MB resident" if rss is not None else ""
+                print(f"{mode:<5} {per_game * 1000:8.1f} ms/game  {parsed}/{len(urls)} parsed  "
+                      f"{heap:6.1f} MB JS heap{rss_text}")
+            full, lean = results["full"][0], results["lean"][0]
+            print(f"Lean mode is {full / lean:.1f}x faster per game.")
+    finally:
+        server.shutdown()
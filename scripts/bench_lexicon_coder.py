@@ -0,0 +1,68 @@
+# ===================================================================
+# Lexicon Auto-Coder Benchmark
+# ===================================================================
+# Times lexicon_coder.py over the hand-coded snippets, repeated until
+# the corpus has `snippets` rows, and reports snippets per second for
+# one regex search per keyword (the baseline), the Aho-Corasick
+# matcher in this process and the matcher over a process pool. Also
+# checks that the baseline and the matcher find the same codes.
+#
+# Usage: python bench_lexicon_coder.py [snippets] [workers]
+# ===================================================================
+
+import re
+import sys
+import time
+
+import pandas as pd
+
+from aggregate_text_data import RAW_TEXT_FILES
+from lexicon_coder import LEXICON, LexiconMatcher, suggest_codes, tokenize
+
+
+def keyword_patterns():
+    """One regex per keyword, matching what LexiconMatcher matches (whole words, optional final s)."""
+    patterns = []
+    for code, phrases in LEXICON.items():
+        for phrase in phrases:
+            words = [re.escape(word) for word in tokenize(phrase)]
+            body = r"[^a-z0-9']+".join(words)
+            suffix = "" if phrase.endswith("s") else "s?"
+            patterns.append((code, re.compile(rf"(?<![a-z0-9']){body}{suffix}(?![a-z0-9'])")))
+    return patterns
+
+
+def codes_by_regex(texts, patterns):
+    return [{code for code, pattern in patterns if pattern.search(text.lower())} for text in texts]
+
+
+def codes_by_matcher(texts, matcher):
+    return [{code for _, code in matcher.matches(tokenize(text))} for text in texts]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    snippets = pd.concat([pd.read_csv(path, dtype=str) for path in RAW_TEXT_FILES], ignore_index=True)
+    corpus = pd.concat([snippets] * (size // len(snippets) + 1), ignore_index=True).iloc[:size]
+    texts = corpus["Snippet Text"].fillna("").tolist()
+    megabytes = sum(len(text) for text in texts) / 1e6
+    print(f"{len(texts)} snippets, {megabytes:.1f} MB of text")
+
+    baseline, baseline_time = timed(codes_by_regex, texts, keyword_patterns())
+    matched, matcher_time = timed(codes_by_matcher, texts, LexiconMatcher())
+    mismatches = sum(a != b for a, b in zip(baseline, matched))
+    print(f"Regex per keyword:           {len(texts) / baseline_time:10,.0f} snippets/s")
+    print(f"Aho-Corasick, 1 process:     {len(texts) / matcher_time:10,.0f} snippets/s  (codes only)")
+    _, single_time = timed(suggest_codes, corpus, 1)
+    print(f"suggest_codes, 1 process:    {len(texts) / single_time:10,.0f} snippets/s  (with C/O)")
+    _, pool_time = timed(suggest_codes, corpus, workers)
+    print(f"suggest_codes, process pool: {len(texts) / pool_time:10,.0f} snippets/s  ({megabytes / pool_time:.1f} MB/s)")
+    print(f"Snippets where the two matchers disagree: {mismatches}")
@@ -0,0 +1,47 @@
+# ===================================================================
+# Play-by-Play Metrics Benchmark
+# ===================================================================
+# Times pbp_metrics.py over a folder of saved play-by-play pages and
+# reports events (table rows) per second, parsing in this process
+# and then spread over a process pool, the way a whole season of
+# pages is handled.
+#
+# Usage: python bench_pbp.py <saved_pages_folder> [repeats]
+# ===================================================================
+
+import sys
+import time
+
+from pbp_metrics import metrics_from_saved_pages, pbp_game_metrics, saved_pbp_pages
+
+
+def time_single_process(pages, repeats):
+    """Best time in seconds to compute every page's metrics in this process, plus the events read."""
+    htmls = []
+    for path, url in pages:
+        with open(path, encoding='utf-8') as f:
+            htmls.append((f.read(), url))
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        events = sum(pbp_game_metrics(html, url)[1] for html, url in htmls)
+        best = min(best, time.perf_counter() - start)
+    return best, events
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pages = saved_pbp_pages(root)
+    if not pages:
+        print(f"No saved play-by-play pages found under '{root}'.")
+        sys.exit(1)
+
+    elapsed, events = time_single_process(pages, repeats)
+    print(f"{len(pages)} pages, {events} events")
+    print(f"Single process (parse only):  {events / elapsed:12,.0f} events/s  ({elapsed / len(pages) * 1000:.2f} ms/page)")
+
+    start = time.perf_counter()
+    _, events = metrics_from_saved_pages(root)
+    elapsed = time.perf_counter() - start
+    print(f"Process pool (read + parse):  {events / elapsed:12,.0f} events/s  ({elapsed:.2f}s total)")
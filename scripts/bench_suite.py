@@ -0,0 +1,498 @@
+# ===================================================================
+# Offline Benchmark Suite
+# ===================================================================
+# Times the hot paths of the project without touching the network
+# and fails when one of them regressed against a stored baseline:
+#   - parsing of recorded basketball-reference pages: box scores
+#     (box_score.py), schedule pages (schedule.py) and play-by-play
+#     pages (pbp_metrics.py), read from FIXTURE_DIR,
+#   - comeback filtering on the raw game tables tiled to 10x-1000x
+#     their size: the csv_analyzer.py path (read the CSV, normalize,
+#     filter), the threshold sweep and the max-deficit rule,
+#   - text aggregation (aggregate_text_data.py) on the coded snippets
+#     tiled the same way, full and incremental with nothing changed.
+# Every benchmark reports the best of REPEATS runs and, from one more
+# run under tracemalloc, its peak memory.
+#
+# `record` copies the fixture pages out of the HTML cache (every page
+# the scrapers load is cached there), fetching the ones it does not
+# have with --fetch, and lays them out like the site so
+# stub_server.py and bench_box_score.py can use the same folder.
+# `synthesize` writes pages in the site's markup built from the raw
+# game tables instead; those are the fixtures committed in
+# data/fixtures/pages/, next to the baseline in bench_baseline.json.
+# Timings depend on the machine, so re-save the baseline with
+# --save-baseline on the machine that runs the suite. `run` exits
+# with an error on a regression, and also when there are no fixture
+# pages or no baseline to compare with.
+#
+# Usage: python bench_suite.py record [--games 20] [--fetch]
+#        python bench_suite.py synthesize [--games 5]
+#        python bench_suite.py run [--scales 10,100,1000] [--save-baseline]
+#        python bench_suite.py run --fixtures <saved_pages_folder> --only parse_box_score pbp_metrics
+# ===================================================================
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from aggregate_text_data import aggregate_articles, aggregate_incremental, finalize_articles, load_snippets, model_table
+from bench_box_score import load_pages
+from box_score import LINE_SCORE_IDS, parse_box_score
+from comeback_analysis import find_comeback_candidates, parse_int_range, select_comebacks, sweep_thresholds
+from game_index import box_score_keys
+from margin_store import max_deficit_stats, season_of
+from normalize_games import normalize_games
+from pbp_metrics import (OVERTIME_SECONDS, QUARTER_SECONDS, format_clock, pbp_game_metrics, pbp_url,
+                         saved_pbp_pages)
+from schedule import parse_schedule_page, schedule_start_url
+
+# --- Configuration, change as needed ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+FIXTURE_DIR = os.path.join(DATA_DIR, "fixtures", "pages") # Recorded pages, laid out like the site
+BASELINE_FILE = os.path.join(DATA_DIR, "fixtures", "bench_baseline.json")
+GAME_FILES = sorted(glob.glob(os.path.join(DATA_DIR, "raw", "*_raw_data_*_bball_ref.csv")))
+SCALES = (10, 100) # Sizes of the synthetic tables, as multiples of the CSVs in data/ (1000 takes ~20 min and 3.5 GB)
+FIXTURE_GAMES = 20 # Games recorded per raw data file
+SYNTHETIC_GAMES = 5 # Games per raw data file in the committed synthetic fixtures
+REPEATS = 3 # Timed runs per benchmark, the best one counts
+TIME_TOLERANCE = 0.25 # Slowdown against the baseline that counts as a regression
+MEMORY_TOLERANCE = 0.25 # Growth of the peak memory that counts as a regression
+NOISE_FLOOR_SECONDS = 0.005 # Differences smaller than this are never a regression
+SWEEP_THRESHOLDS = "5-30"
+COMEBACK_THRESHOLD = 18
+SCORING_CHANGES = 120 # Margin changes per synthetic game for the max-deficit benchmark
+MARGIN_GAMES_LIMIT = 100000 # Cap on its games: the margin store works one season partition at a time
+
+
+def fixture_path(url, root=FIXTURE_DIR):
+    """Where a page is saved under `root`, e.g. <root>/boxscores/202312290ATL.html."""
+    return os.path.join(root, *urlsplit(url).path.lstrip('/').split('/'))
+
+
+def fixture_urls(csv_files=GAME_FILES, games=FIXTURE_GAMES):
+    """The season's first schedule page plus the box-score and PBP pages of the first `games` games, per file."""
+    urls = []
+    for path in csv_files:
+        game_urls = pd.read_csv(path)['Game_URL'].dropna().head(games).tolist()
+        if not game_urls:
+            continue
+        league = "WNBA" if "/wnba/" in game_urls[0] else "NBA"
+        urls.append(schedule_start_url(league, season_of(league, game_urls[0])))
+        urls += game_urls + [pbp_url(url) for url in game_urls]
+    return urls
+
+
+def write_fixtures(pages, root=FIXTURE_DIR):
+    """Saves {url: html} pages under `root`, laid out like the site. Returns the URLs written."""
+    for url, html in pages.items():
+        path = fixture_path(url, root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+    return list(pages)
+
+
+def record_fixtures(urls, root=FIXTURE_DIR, fetch=False, cache=None):
+    """
+    Saves the pages of `urls` under `root`, taking them from the HTML cache.
+
+    Args:
+        urls (list): Page URLs to record.
+        root (str): Fixture folder.
+        fetch (bool): Fetch pages missing from the cache (within the usual request budget).
+        cache (HtmlCache): Cache to read from, the scrapers' default cache if not given.
+
+    Returns:
+        tuple: (recorded, missing) lists of URLs.
+    """
+    from html_cache import HtmlCache
+
+    cache = cache or HtmlCache()
+    pages = {url: cache.get(url) for url in urls}
+    missing = [url for url, html in pages.items() if html is None]
+    if missing and fetch:
+        from fetch_engine import fetch_pages
+
+        def handle_page(url, html, error):
+            if error is None:
+                pages[url] = html
+            else:
+                print(f"---! Could not fetch {url}: {error}")
+
+        print(f"Fetching {len(missing)} pages missing from the HTML cache...")
+        asyncio.run(fetch_pages(missing, handle_page, cache=cache))
+
+    recorded = write_fixtures({url: html for url, html in pages.items() if html is not None}, root)
+    return recorded, [url for url in urls if pages[url] is None]
+
+
+def _split_points(total, parts, rng):
+    """Splits `total` points into `parts` period scores that differ a little from each other."""
+    weights = rng.uniform(0.8, 1.2, parts)
+    points = np.floor(total * weights / weights.sum()).astype(int)
+    points[-1] += total - points.sum()
+    return [int(p) for p in points]
+
+
+def _scoring_plays(points, rng):
+    """Splits a team's points of one period into 3-, 2- and 1-point plays."""
+    plays = []
+    while points > 0:
+        play = min(points, int(rng.choice([1, 2, 2, 2, 3])))
+        plays.append(play)
+        points -= play
+    return plays
+
+
+def synthetic_box_score(game, league, periods, rng, players=12):
+    """A box-score page in the site's markup: scorebox, two player tables and the line score in a comment."""
+    table_id = LINE_SCORE_IDS[league]
+    date = pd.Timestamp(game["Date"]).strftime("%B %d, %Y").replace(" 0", " ")
+    rows = []
+    for team, team_periods, final in (("away", periods[0], game["Final_Score_Away"]),
+                                      ("home", periods[1], game["Final_Score_Home"])):
+        cells = "".join(f'<td class="center" data-stat="{i + 1}">{points}</td>' for i, points in enumerate(team_periods))
+        rows.append(f'<tr><th scope="row" class="left" data-stat="team"><a href="/teams/{game[team + "_code"]}/">'
+                    f'{game[team + "_code"]}</a></th>{cells}<td class="center" data-stat="T"><strong>{final}</strong>'
+                    f'</td></tr>')
+    header = "".join(f'<th data-stat="{i + 1}">{i + 1 if i < 4 else f"{i - 3}OT"}</th>' for i in range(len(periods[0])))
+    line_score = (f'<div id="all_{table_id}" class="table_wrapper"><div class="placeholder"></div><!--\n'
+                  f'<div class="table_container" id="div_{table_id}"><table class="suppress_all stats_table" '
+                  f'id="{table_id}"><thead><tr><th data-stat="team"></th>{header}<th data-stat="T">T</th></tr>'
+                  f'</thead><tbody>{"".join(rows)}</tbody></table></div>\n--></div>')
+    stat_names = ["mp", "fg", "fga", "fg_pct", "fg3", "fg3a", "ft", "fta", "orb", "drb", "trb", "ast", "stl",
+                  "blk", "tov", "pf", "pts", "plus_minus"]
+    box_tables = []
+    for team in ("away", "home"):
+        body = "".join(
+            f'<tr><th scope="row" data-stat="player"><a href="/players/x/player{n:02d}.html">Player {n}</a></th>'
+            + "".join(f'<td class="right" data-stat="{name}">{rng.integers(0, 12)}</td>' for name in stat_names)
+            + "</tr>" for n in range(players))
+        box_tables.append(f'<div class="table_wrapper"><table class="sortable stats_table" '
+                          f'id="box-{game[team + "_code"]}-game-basic"><tbody>{body}</tbody></table></div>')
+    return (f'<!DOCTYPE html><html><head><title>{game["Away_Team"]} vs {game["Home_Team"]} Box Score</title>'
+            f'<link rel="stylesheet" href="/css/site.css"></head><body><div id="wrap"><div id="content">'
+            f'<h1>{game["Away_Team"]} vs {game["Home_Team"]} Box Score, {date}</h1>'
+            f'<div class="scorebox"><div><strong><a href="/teams/{game["away_code"]}/">{game["Away_Team"]}</a></strong>'
+            f'</div><div><strong><a href="/teams/{game["home_code"]}/">{game["Home_Team"]}</a></strong></div>'
+            f'<div class="scorebox_meta"><div>7:30 PM, {date}</div><div>Arena</div></div></div>'
+            f'{line_score}{"".join(box_tables)}</div></div></body></html>')
+
+
+def synthetic_pbp(game, league, periods, rng):
+    """A play-by-play page whose scoring plays add up to the given period scores, with misses, fouls and turnovers."""
+    period_seconds = QUARTER_SECONDS[league]
+    names = (game["Away_Team"], game["Home_Team"])
+    rows = [f'<tr class="thead"><th>Time</th><th>{names[0]}</th><th></th><th>Score</th><th></th>'
+            f'<th>{names[1]}</th></tr>']
+    score = [0, 0]
+    for period, (away_points, home_points) in enumerate(zip(*periods)):
+        length = period_seconds if period < 4 else OVERTIME_SECONDS
+        heading = f'{("1st", "2nd", "3rd", "4th")[period]} quarter' if period < 4 else f"{period - 3}st overtime"
+        rows.append(f'<tr><td>{format_clock(length)}</td><td colspan="5">Start of {heading}</td></tr>')
+        plays = [(0, points) for points in _scoring_plays(away_points, rng)]
+        plays += [(1, points) for points in _scoring_plays(home_points, rng)]
+        plays += [(int(rng.integers(0, 2)), 0) for _ in range(len(plays))] # Misses, fouls, turnovers
+        order = rng.permutation(len(plays))
+        clocks = np.sort(rng.uniform(0, length, len(plays)))[::-1]
+        for clock, index in zip(clocks, order):
+            side, points = plays[index]
+            player = f"Player {rng.integers(0, 12)}"
+            if points:
+                score[side] += points
+                text = f"{player} makes free throw 1 of 2" if points == 1 else f"{player} makes {points}-pt jump shot"
+            else:
+                text = rng.choice([f"{player} misses 2-pt jump shot", f"{player} misses 3-pt jump shot",
+                                   f"Turnover by {player} (bad pass)", f"Shooting foul by {player}"])
+            cells = [f"<td>{text}</td>", "<td></td>"] if side == 0 else ["<td></td>", "<td></td>"]
+            home_cells = ["<td></td>", f"<td>{text}</td>"] if side == 1 else ["<td></td>", "<td></td>"]
+            rows.append(f'<tr><td>{format_clock(clock)}</td>{cells[0]}{cells[1]}'
+                        f'<td class="center">{score[0]}-{score[1]}</td>{home_cells[0]}{home_cells[1]}</tr>')
+            if rng.random() < 0.03:
+                rows.append(f'<tr><td>{format_clock(clock)}</td><td colspan="5">{names[side]} full timeout</td></tr>')
+    return (f'<!DOCTYPE html><html><head><title>{game["Away_Team"]} vs {game["Home_Team"]} Play-By-Play</title>'
+            f'</head><body><div class="scorebox"><div><a href="/teams/{game["away_code"]}/">{game["Away_Team"]}</a>'
+            f'</div><div><a href="/teams/{game["home_code"]}/">{game["Home_Team"]}</a></div></div>'
+            f'<div class="table_container" id="div_pbp"><table class="suppress_all stats_table" id="pbp">'
+            f'<tbody>{"".join(rows)}</tbody></table></div></body></html>')
+
+
+def synthetic_schedule(league, season, game_urls):
+    """A schedule page listing `game_urls` in box_score_text cells, plus the NBA month links."""
+    months = "".join(f'<a href="/leagues/NBA_{season}_games-{month}.html">{month.title()}</a>'
+                     for month in ("october", "november", "december")) if league == "NBA" else ""
+    rows = "".join(f'<tr><th data-stat="date_game">Game {n}</th><td data-stat="box_score_text">'
+                   f'<a href="{urlsplit(url).path}">Box Score</a></td></tr>' for n, url in enumerate(game_urls))
+    return (f'<!DOCTYPE html><html><body><div class="filter">{months}</div><table id="schedule"><tbody>'
+            f'{rows}<tr><th data-stat="date_game">Later</th><td data-stat="box_score_text"></td></tr>'
+            f'</tbody></table></body></html>')
+
+
+def synthetic_fixtures(csv_files=GAME_FILES, games=SYNTHETIC_GAMES, seed=0):
+    """
+    Builds fixture pages from the scores in the raw game files, for trees without recorded pages:
+    the same URLs as fixture_urls(), with the box scores, play-by-play and schedule in the markup
+    the parsers read. Periods are made up around the real halftime and final scores.
+
+    Returns:
+        dict: URL -> page HTML.
+    """
+    rng = np.random.default_rng(seed)
+    pages = {}
+    for path in csv_files:
+        table = box_score_keys(pd.read_csv(path).dropna(subset=['Game_URL']).head(games))
+        if table.empty:
+            continue
+        league = table['League'].iat[0]
+        season = season_of(league, table['Game_URL'].iat[0])
+        pages[schedule_start_url(league, season)] = synthetic_schedule(league, season, table['Game_URL'])
+        for game in table.to_dict('records'):
+            game["home_code"] = game["Home_Code"]
+            game["away_code"] = game["Away_Code"] or game["Away_Team"][:3].upper()
+            halves = [(game["Halftime_Score_Away"], game["Final_Score_Away"] - game["Halftime_Score_Away"]),
+                      (game["Halftime_Score_Home"], game["Final_Score_Home"] - game["Halftime_Score_Home"])]
+            periods = [_split_points(first, 2, rng) + _split_points(second, 2, rng) for first, second in halves]
+            pages[game["Game_URL"]] = synthetic_box_score(game, league, periods, rng)
+            pages[pbp_url(game["Game_URL"])] = synthetic_pbp(game, league, periods, rng)
+    return pages
+
+
+def scaled_games(scale, csv_files=GAME_FILES):
+    """
+    The raw game tables of both leagues tiled `scale` times. Game_URLs repeat, which none of
+    the timed steps depend on.
+    """
+    games = pd.concat([pd.read_csv(path) for path in csv_files], ignore_index=True)
+    return pd.concat([games] * scale, ignore_index=True)
+
+
+def scaled_snippets(scale):
+    """The coded snippets tiled `scale` times, each copy with its own Game IDs and article URLs."""
+    snippets = load_snippets().drop(columns="Row")
+    copies = []
+    for copy in range(scale):
+        tiled = snippets.copy()
+        tiled["Game ID"] = tiled["Game ID"] + f"_{copy}"
+        tiled["URL of Article"] = tiled["URL of Article"] + f"#{copy}"
+        tiled["Filed URL"] = tiled["Filed URL"] + f"#{copy}"
+        copies.append(tiled)
+    tiled = pd.concat(copies, ignore_index=True)
+    tiled["Row"] = np.arange(len(tiled))
+    return tiled
+
+
+def synthetic_margins(n_games, changes=SCORING_CHANGES, seed=0):
+    """Flat margin/elapsed/offset arrays of random-walk games, as stored by margin_store.py."""
+    rng = np.random.default_rng(seed)
+    steps = rng.choice(np.array([-3, -2, -1, 1, 2, 3], np.int16), size=(n_games, changes))
+    steps[:, 0] = 0
+    margins = np.cumsum(steps, axis=1, dtype=np.int16)
+    margins[margins[:, -1] == 0, -1] = 1 # No ties at the end
+    elapsed = np.sort(rng.integers(0, 2880, size=(n_games, changes), dtype=np.uint16), axis=1)
+    offsets = np.arange(n_games + 1, dtype=np.int64) * changes
+    return margins.ravel(), elapsed.ravel(), offsets
+
+
+PAGE_BENCHMARKS = ("parse_box_score", "parse_schedule", "pbp_metrics")
+
+
+def page_benchmarks(root=FIXTURE_DIR):
+    """(name, scale, units, function) for every kind of fixture page found under `root`."""
+    box_scores = load_pages(root)
+    if box_scores:
+        yield ("parse_box_score", 1, len(box_scores),
+               lambda: [parse_box_score(html, league, path) for league, path, html in box_scores])
+
+    schedules = []
+    for path in sorted(glob.glob(os.path.join(root, "leagues", "*.html"))
+                       + glob.glob(os.path.join(root, "wnba", "years", "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            schedules.append(f.read())
+    if schedules:
+        yield "parse_schedule", 1, len(schedules), lambda: [parse_schedule_page(html) for html in schedules]
+
+    pbp_pages = []
+    for path, url in saved_pbp_pages(root):
+        with open(path, encoding="utf-8") as f:
+            pbp_pages.append((f.read(), url))
+    if pbp_pages:
+        yield "pbp_metrics", 1, len(pbp_pages), lambda: [pbp_game_metrics(html, url) for html, url in pbp_pages]
+
+
+def table_benchmarks(scale, work_dir):
+    """(name, scale, units, function) for the comeback and aggregation benchmarks at one scale."""
+    games = scaled_games(scale)
+    csv_path = os.path.join(work_dir, f"games_{scale}.csv")
+    games.to_csv(csv_path, index=False)
+    thresholds = parse_int_range(SWEEP_THRESHOLDS)
+    stats = pd.DataFrame({"Game_URL": games["Game_URL"].unique()})
+    stats["Max_Deficit_Overcome"] = np.random.default_rng(0).integers(0, 30, len(stats))
+    for column in ("Deficit_Peak_Seconds", "Time_To_Tie_Seconds", "Comeback_Team"):
+        stats[column] = np.nan
+
+    # Same steps as csv_analyzer.find_comebacks(), minus the printing and the output file.
+    yield ("csv_analyzer", scale, len(games),
+           lambda: find_comeback_candidates(normalize_games(pd.read_csv(csv_path)), COMEBACK_THRESHOLD))
+    yield "comeback_filter", scale, len(games), lambda: find_comeback_candidates(games, COMEBACK_THRESHOLD)
+    yield "threshold_sweep", scale, len(games), lambda: sweep_thresholds(games, thresholds)
+    yield ("max_deficit_rule", scale, len(games),
+           lambda: select_comebacks(games, COMEBACK_THRESHOLD, "max_deficit", stats))
+    margin_games = min(len(games), MARGIN_GAMES_LIMIT)
+    margins = synthetic_margins(margin_games)
+    yield "max_deficit_stats", scale, margin_games, lambda: max_deficit_stats(*margins)
+    del games, margins
+
+    snippets = scaled_snippets(scale)
+    state_path = os.path.join(work_dir, f"articles_{scale}.csv")
+    aggregate_incremental(snippets, state_path, full=True)
+    yield "aggregate_articles", scale, len(snippets), lambda: aggregate_articles(snippets)
+    yield ("aggregate_tables", scale, len(snippets),
+           lambda: model_table(finalize_articles(aggregate_articles(snippets))))
+    yield "aggregate_unchanged", scale, len(snippets), lambda: aggregate_incremental(snippets, state_path)
+
+
+def measure(function, repeats=REPEATS):
+    """Best wall time in seconds over `repeats` runs and the peak traced memory of one more run, in MB."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def run_suite(scales=SCALES, fixture_dir=FIXTURE_DIR, repeats=REPEATS, only=None):
+    """
+    Runs every benchmark, printing each result as it finishes.
+
+    Args:
+        scales (iterable): Sizes of the synthetic tables.
+        fixture_dir (str): Folder of fixture pages. Page benchmarks are skipped when it is empty.
+        repeats (int): Timed runs per benchmark.
+        only (list): Benchmark names to run, all of them if None.
+
+    Returns:
+        dict: "name@scale" -> {"seconds", "peak_mb", "units", "units_per_second"}.
+    """
+    results = {}
+    print(f"{'Benchmark':<24}{'Scale':>7}{'Units':>11}{'Best s':>10}{'Units/s':>13}{'Peak MB':>10}")
+
+    def run(benchmarks):
+        for name, scale, units, function in benchmarks:
+            if only and name not in only:
+                continue
+            seconds, peak_mb = measure(function, repeats)
+            results[f"{name}@{scale}"] = {"seconds": seconds, "peak_mb": peak_mb, "units": units,
+                                          "units_per_second": units / seconds if seconds else None}
+            print(f"{name:<24}{scale:>7}{units:>11,}{seconds:>10.3f}{units / seconds:>13,.0f}{peak_mb:>10.1f}")
+
+    if not os.path.isdir(fixture_dir) or not os.listdir(fixture_dir):
+        print(f"No fixture pages in '{fixture_dir}', skipping the page benchmarks "
+              f"(run `bench_suite.py record` or `bench_suite.py synthesize`).")
+    else:
+        run(page_benchmarks(fixture_dir))
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scale in scales:
+            run(table_benchmarks(scale, work_dir))
+    return results
+
+
+def find_regressions(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Compares results with a baseline of the same shape.
+
+    Returns:
+        list: One message per benchmark that got slower than time_tolerance or grew its peak memory
+              past memory_tolerance. Benchmarks missing from either side are not compared.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        allowed = max(base["seconds"] * (1 + time_tolerance), base["seconds"] + NOISE_FLOOR_SECONDS)
+        if result["seconds"] > allowed:
+            regressions.append(f"{key}: {result['seconds']:.3f}s vs {base['seconds']:.3f}s baseline "
+                               f"({result['seconds'] / base['seconds'] - 1:+.0%})")
+        if result["peak_mb"] > max(base["peak_mb"] * (1 + memory_tolerance), base["peak_mb"] + 1):
+            regressions.append(f"{key}: peak {result['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB baseline")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline benchmarks of page parsing, comeback filtering and text aggregation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Copy fixture pages out of the HTML cache")
+    record.add_argument("csv_files", nargs='*', default=GAME_FILES, help="Raw game files to take the games from")
+    record.add_argument("--games", type=int, default=FIXTURE_GAMES, help="Games per file")
+    record.add_argument("--fetch", action="store_true", help="Fetch pages missing from the cache")
+    record.add_argument("--fixtures", default=FIXTURE_DIR)
+    synthesize = commands.add_parser("synthesize", help="Write synthetic fixture pages built from the raw game tables")
+    synthesize.add_argument("csv_files", nargs='*', default=GAME_FILES, help="Raw game files to take the games from")
+    synthesize.add_argument("--games", type=int, default=SYNTHETIC_GAMES, help="Games per file")
+    synthesize.add_argument("--fixtures", default=FIXTURE_DIR)
+    run = commands.add_parser("run", help="Run the benchmarks and compare them with the baseline")
+    run.add_argument("--scales", default=",".join(map(str, SCALES)), help="Table sizes, e.g. 10,100 or 10-20")
+    run.add_argument("--repeats", type=int, default=REPEATS)
+    run.add_argument("--only", nargs='+', help="Benchmark names to run")
+    run.add_argument("--fixtures", default=FIXTURE_DIR)
+    run.add_argument("--baseline", default=BASELINE_FILE)
+    run.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    run.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="Allowed slowdown, 0.25 = 25%%")
+    run.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        recorded, missing = record_fixtures(fixture_urls(args.csv_files, args.games), args.fixtures, args.fetch)
+        print(f"Recorded {len(recorded)} pages under '{args.fixtures}'.")
+        if missing:
+            print(f"{len(missing)} pages are not in the HTML cache (use --fetch), e.g. {missing[0]}")
+        sys.exit(0)
+    if args.command == "synthesize":
+        written = write_fixtures(synthetic_fixtures(args.csv_files, args.games), args.fixtures)
+        print(f"Wrote {len(written)} synthetic pages under '{args.fixtures}'.")
+        sys.exit(0)
+
+    results = run_suite(parse_int_range(args.scales), args.fixtures, args.repeats, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    expected_pages = set(PAGE_BENCHMARKS) & set(args.only or PAGE_BENCHMARKS)
+    missing_pages = expected_pages - {key.split("@")[0] for key in results}
+    if missing_pages:
+        print(f"\nNo fixture pages for {', '.join(sorted(missing_pages))} under '{args.fixtures}', "
+              f"so page parsing was not checked.")
+        sys.exit(1)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved the baseline to '{args.baseline}'.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against '{args.baseline}':")
+            print("\n".join(f"  {message}" for message in regressions))
+            sys.exit(1)
+        print(f"\nNo regressions against '{args.baseline}'.")
+    else:
+        print(f"\nNo baseline at '{args.baseline}' to compare with, run with --save-baseline to store one.")
+        sys.exit(1)
@@ -0,0 +1,166 @@
+# ===================================================================
+# Box Score Parser
+# ===================================================================
+# Turns the HTML of a basketball-reference.com box-score page into
+# the game row both scrapers save. The page is streamed once through
+# lxml's parser and everything we need (teams, every quarter and OT
+# column, finals and the game date) is picked up in that single pass,
+# without building a document tree. Works on the raw server HTML
+# (where the line score table is hidden inside an HTML comment) as
+# well as on pages already rendered by a browser.
+# ===================================================================
+
+from lxml import etree
+
+# The line score table ID differs between the two leagues.
+LINE_SCORE_IDS = {
+    "NBA": "line_score",
+    "WNBA": "line-score",
+}
+
+
+class MissingLineScore(ValueError):
+    """The page has no line score table, e.g. it still needs JS to render or it is an error page."""
+
+
+class _LineScoreTarget:
+    """
+    lxml parser target that collects the line score rows, the scorebox date and the page title
+    while the page streams past. Used once per page, then read through close().
+    """
+
+    def __init__(self, table_id):
+        self.table_id = table_id
+        self.comment_marker = f'id="{table_id}"'
+        self.rows = []
+        self.date = None
+        self.title = None
+        self._in_table = self._in_tbody = False
+        self._row = self._cell = self._text = None
+        self._meta_depth = 0 # Nesting depth inside .scorebox_meta, 0 when outside it
+        self._capture = None # Which piece of page text the data() calls are feeding ("date"/"title")
+
+    def start(self, tag, attrib):
+        if self._in_table:
+            if tag == 'tbody':
+                self._in_tbody = True
+            elif tag == 'tr' and self._in_tbody:
+                self._row = {"periods": []}
+            elif tag in ('th', 'td') and self._row is not None:
+                self._cell = attrib.get('data-stat')
+                self._text = []
+        elif tag == 'table' and attrib.get('id') == self.table_id:
+            self._in_table = True
+        elif tag == 'div':
+            if self._meta_depth:
+                self._meta_depth += 1
+                # The first child div of the scorebox holds the tip-off time and date.
+                if self._meta_depth == 2 and self.date is None:
+                    self._capture, self._text = "date", []
+            elif 'scorebox_meta' in attrib.get('class', '').split():
+                self._meta_depth = 1
+        elif tag == 'h1' and self.title is None:
+            self._capture, self._text = "title", []
+
+    def data(self, text):
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag):
+        if self._in_table:
+            if tag in ('th', 'td') and self._cell is not None:
+                value = ''.join(self._text).strip()
+                if self._cell == 'team':
+                    self._row["team"] = value
+                elif self._cell == 'T':
+                    self._row["final"] = value
+                else:
+                    self._row["periods"].append(value) # 1-4, then any OT columns in page order
+                self._cell = self._text = None
+            elif tag == 'tr' and self._row is not None:
+                self.rows.append(self._row)
+                self._row = None
+            elif tag == 'tbody':
+                self._in_tbody = False
+            elif tag == 'table':
+                self._in_table = False
+        elif tag == 'div' and self._meta_depth:
+            if self._capture == "date" and self._meta_depth == 2:
+                self.date = ''.join(self._text).strip()
+                self._capture = self._text = None
+            self._meta_depth -= 1
+        elif tag == 'h1' and self._capture == "title":
+            self.title = ''.join(self._text).strip()
+            self._capture = self._text = None
+
+    def comment(self, text):
+        # Before JS runs, basketball-reference ships the line score table inside a comment.
+        if not self.rows and self.comment_marker in text:
+            etree.fromstring(text, etree.HTMLParser(target=self))
+
+    def close(self):
+        return self
+
+
+def parse_line_score(html, league):
+    """
+    Parses the full line score of a box-score page in one pass.
+
+    Args:
+        html (str): The page HTML, either straight from the server or from driver.page_source.
+        league (str): "NBA" or "WNBA", used to pick the line score table ID.
+
+    Returns:
+        dict: away_team, home_team, away_periods and home_periods (lists of ints covering every
+              quarter and OT period), away_final, home_final and game_date.
+
+    Raises:
+        MissingLineScore: If the page has no line score table (e.g. it still needs JS to render).
+    """
+    target = etree.fromstring(html, etree.HTMLParser(target=_LineScoreTarget(LINE_SCORE_IDS[league])))
+    if len(target.rows) < 2:
+        raise MissingLineScore("No line score table found")
+    away_row, home_row = target.rows[0], target.rows[1]
+
+    # The scorebox has the tip-off time and date. Pages without one fall back to the
+    # title, which ends with the date ("... Box Score, May 19, 2023").
+    game_date = target.date
+    if not game_date and target.title:
+        game_date = target.title.split("Box Score,")[-1].strip()
+
+    return {
+        "away_team": away_row["team"], "home_team": home_row["team"],
+        "away_periods": [int(points) for points in away_row["periods"]],
+        "home_periods": [int(points) for points in home_row["periods"]],
+        "away_final": int(away_row["final"]), "home_final": int(home_row["final"]),
+        "game_date": game_date,
+    }
+
+
+def parse_box_score(html, league, url):
+    """
+    Parses a box-score page into a game row.
+
+    Args:
+        html (str): The page HTML, either straight from the server or from driver.page_source.
+        league (str): "NBA" or "WNBA".
+        url (str): The box-score URL, stored as Game_URL.
+
+    Returns:
+        dict: The game row with the same columns as the *_raw_data_*.csv files.
+
+    Raises:
+        MissingLineScore: If the page has no line score table (e.g. it still needs JS to render).
+        ValueError: If the line score holds something other than points.
+    """
+    try:
+        line_score = parse_line_score(html, league)
+    except MissingLineScore:
+        raise MissingLineScore(f"No line score table found on {url}")
+
+    return {
+        "Game_Date": line_score["game_date"], "Home_Team": line_score["home_team"], "Away_Team": line_score["away_team"],
+        "Halftime_Score_Home": sum(line_score["home_periods"][:2]),
+        "Halftime_Score_Away": sum(line_score["away_periods"][:2]),
+        "Final_Score_Home": line_score["home_final"], "Final_Score_Away": line_score["away_final"], "Game_URL": url
+    }
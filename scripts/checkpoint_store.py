@@ -0,0 +1,113 @@
+# ===================================================================
+# Scrape Checkpoint Store
+# ===================================================================
+# Append-only record of every scraped game, kept in a SQLite file in
+# WAL mode and keyed by Game_URL. Each game is committed on its own
+# as soon as it is scraped, so a save costs the same whether it is
+# the 1st or the 1,300th game of the season, a crash loses at most
+# the game in flight, and resuming only needs the indexed URL column.
+# The *_raw_data_*.csv file is written from the store once at the
+# end of a run, with the date, home code and game sequence already
+# normalized (see normalize_games.py).
+# ===================================================================
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from normalize_games import normalize_games
+from scrape_metrics import METRICS
+
+# Column order of the *_raw_data_*.csv files.
+GAME_COLUMNS = ["Game_Date", "Home_Team", "Away_Team", "Halftime_Score_Home", "Halftime_Score_Away",
+                "Final_Score_Home", "Final_Score_Away", "Game_URL"]
+
+
+class CheckpointStore:
+    """Game rows keyed by Game_URL, committed one at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable against the scraper crashing, only an OS crash could drop the last commit.
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                Game_URL TEXT PRIMARY KEY,
+                Game_Date TEXT,
+                Home_Team TEXT,
+                Away_Team TEXT,
+                Halftime_Score_Home INTEGER,
+                Halftime_Score_Away INTEGER,
+                Final_Score_Home INTEGER,
+                Final_Score_Away INTEGER,
+                Seq INTEGER
+            )
+        """)
+        self._next_seq = self.db.execute("SELECT COALESCE(MAX(Seq), 0) + 1 FROM games").fetchone()[0]
+
+    def _row(self, game_info):
+        self._next_seq += 1
+        return (game_info["Game_URL"], game_info["Game_Date"], game_info["Home_Team"], game_info["Away_Team"],
+                game_info["Halftime_Score_Home"], game_info["Halftime_Score_Away"],
+                game_info["Final_Score_Home"], game_info["Final_Score_Away"], self._next_seq - 1)
+
+    def add(self, game_info):
+        """
+        Commits one game row. A row already stored for the same Game_URL is replaced in place,
+        keeping its position in the exported CSV.
+        """
+        with METRICS.stage("checkpoint_write"), self.db:
+            self.db.execute("""
+                INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (Game_URL) DO UPDATE SET
+                    Game_Date = excluded.Game_Date, Home_Team = excluded.Home_Team, Away_Team = excluded.Away_Team,
+                    Halftime_Score_Home = excluded.Halftime_Score_Home, Halftime_Score_Away = excluded.Halftime_Score_Away,
+                    Final_Score_Home = excluded.Final_Score_Home, Final_Score_Away = excluded.Final_Score_Away
+            """, self._row(game_info))
+
+    def __contains__(self, url):
+        return self.db.execute("SELECT 1 FROM games WHERE Game_URL = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def scraped_urls(self):
+        """The set of Game_URLs already stored, read straight off the primary key index."""
+        return {row[0] for row in self.db.execute("SELECT Game_URL FROM games")}
+
+    def import_csv(self, csv_path):
+        """
+        Loads an older *_raw_data_*.csv into an empty store so runs started before the store
+        existed can resume. Does nothing if the store already has games or the file is missing.
+        """
+        if len(self) or not os.path.exists(csv_path):
+            return 0
+        df = pd.read_csv(csv_path).drop_duplicates(subset=['Game_URL'], keep='last')
+        if 'Game_Date_Text' in df: # Written by export_csv(), the store keeps the scraped text
+            df['Game_Date'] = df['Game_Date_Text']
+        df = df.astype(object).where(df.notna(), None) # NaN -> NULL, numpy ints -> plain ints
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                [self._row(game_info) for game_info in df.to_dict('records')])
+        return len(df)
+
+    def to_dataframe(self):
+        """All stored games in scrape order, with the *_raw_data_*.csv columns."""
+        columns = ", ".join(GAME_COLUMNS)
+        return pd.read_sql_query(f"SELECT {columns} FROM games ORDER BY Seq", self.db)
+
+    def export_csv(self, csv_path):
+        """
+        Writes the stored games to `csv_path` in one go and returns how many were written. Game_Date
+        is written as the YYYY-MM-DD date from the box-score URL, followed by the scraped text
+        (Game_Date_Text), Home_Code and Game_Seq.
+        """
+        df = normalize_games(self.to_dataframe())
+        df.to_csv(csv_path, index=False)
+        return len(df)
+
+    def close(self):
+        self.db.close()
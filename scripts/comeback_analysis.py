@@ -0,0 +1,140 @@
+# ===================================================================
+# Comeback Analysis Library
+# ===================================================================
+# The halftime comeback rule shared by both scrapers and
+# csv_analyzer.py: how far behind the trailing team was at halftime,
+# which team that was, and whether it went on to win. Everything is
+# computed with whole-column NumPy/pandas operations, and a list of
+# thresholds can be swept in one pass over the data.
+# select_comebacks() can use the largest deficit of the whole game
+# from the margin store (margin_store.py) instead of the halftime
+# deficit, and csv_analyzer.find_comebacks() takes the same rule.
+#
+# Usage: python comeback_analysis.py <raw_data.csv> [...] [--thresholds 5-30] [--rule max_deficit]
+# ===================================================================
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def add_halftime_metrics(df):
+    """
+    Adds Halftime_Deficit_Amount and Trailing_Team_Halftime to a games DataFrame (in place).
+    As in the original rule, the away team counts as trailing when the halftime score is tied.
+    """
+    home = df['Halftime_Score_Home'].to_numpy()
+    away = df['Halftime_Score_Away'].to_numpy()
+    df['Halftime_Deficit_Amount'] = np.abs(home - away)
+    df['Trailing_Team_Halftime'] = np.where(home < away, df['Home_Team'].to_numpy(), df['Away_Team'].to_numpy())
+    return df
+
+
+def comeback_won(df):
+    """Boolean array: did the team trailing at halftime win the game?"""
+    home_trailed = df['Halftime_Score_Home'].to_numpy() < df['Halftime_Score_Away'].to_numpy()
+    final_home = df['Final_Score_Home'].to_numpy()
+    final_away = df['Final_Score_Away'].to_numpy()
+    return np.where(home_trailed, final_home > final_away, final_away > final_home)
+
+
+def find_comeback_candidates(df, threshold):
+    """
+    Returns the games where the halftime deficit was at least `threshold` points and the trailing
+    team won, in their original order, with the halftime metric columns added.
+    """
+    df = add_halftime_metrics(df.copy())
+    mask = (df['Halftime_Deficit_Amount'].to_numpy() >= threshold) & comeback_won(df)
+    return df[mask].copy()
+
+
+def select_comebacks(df, threshold, rule="halftime", stats=None):
+    """
+    Returns the comeback games of `df` under either rule, in their original order.
+
+    Args:
+        df (pd.DataFrame): Games with the *_raw_data_*.csv columns.
+        threshold (int): Minimum deficit in points.
+        rule (str): 'halftime' for the halftime deficit (find_comeback_candidates), or 'max_deficit'
+                    for the largest deficit the winner overcame at any point of the game.
+        stats (pd.DataFrame): Per-game statistics from margin_store.comeback_stats(), loaded from
+                              the margin store when not given. Only used by 'max_deficit'.
+
+    Returns:
+        pd.DataFrame: The matching games. Under 'max_deficit' with the margin store columns
+                      (Max_Deficit_Overcome, Deficit_Peak_Seconds, Time_To_Tie_Seconds,
+                      Comeback_Team) added; games missing from the store are left out.
+    """
+    if rule == "halftime":
+        return find_comeback_candidates(df, threshold)
+    if rule != "max_deficit":
+        raise ValueError(f"Unknown comeback rule '{rule}'")
+    if stats is None:
+        from margin_store import comeback_stats
+
+        stats = comeback_stats()
+    stats = stats[['Game_URL', 'Max_Deficit_Overcome', 'Deficit_Peak_Seconds', 'Time_To_Tie_Seconds',
+                   'Comeback_Team']].drop_duplicates('Game_URL')
+    merged = df.merge(stats, on='Game_URL', how='inner')
+    return merged[merged['Max_Deficit_Overcome'].to_numpy() >= threshold].copy()
+
+
+def sweep_thresholds(df, thresholds):
+    """
+    Finds the comeback candidates for every threshold in one pass.
+
+    Args:
+        df (pd.DataFrame): Games with the *_raw_data_*.csv columns.
+        thresholds (iterable): Minimum halftime deficits to evaluate.
+
+    Returns:
+        tuple: (counts, rows) where counts is a Series of candidate counts indexed by threshold and
+               rows maps each threshold to its candidates, largest deficit first.
+    """
+    df = add_halftime_metrics(df.copy())
+    won = df[comeback_won(df)]
+    # Sort the successful comebacks by deficit once; every threshold is then a prefix of this table.
+    won = won.iloc[np.argsort(-won['Halftime_Deficit_Amount'].to_numpy(), kind='stable')]
+    descending = won['Halftime_Deficit_Amount'].to_numpy()
+
+    thresholds = np.asarray(sorted(set(thresholds)))
+    # Number of deficits >= t is the insertion point of -t in the ascending array of -deficits.
+    counts = np.searchsorted(-descending, -thresholds, side='right')
+    rows = {int(threshold): won.iloc[:count] for threshold, count in zip(thresholds, counts)}
+    return pd.Series(counts, index=thresholds.astype(int), name='Comebacks'), rows
+
+
+def parse_int_range(text):
+    """Turns '5-30' into [5, ..., 30] and '11,18' into [11, 18] (thresholds or seasons)."""
+    if '-' in text:
+        low, high = (int(part) for part in text.split('-'))
+        return list(range(low, high + 1))
+    return [int(part) for part in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Count comebacks for a range of thresholds.")
+    parser.add_argument("csv_files", nargs='+', help="Raw game data files (*_raw_data_*.csv)")
+    parser.add_argument("--thresholds", default="5-30", help="Range like 5-30 or a list like 11,18")
+    parser.add_argument("--rule", choices=["halftime", "max_deficit"], default="halftime",
+                        help="max_deficit uses the largest deficit from the margin store (margin_store.py)")
+    args = parser.parse_args()
+
+    thresholds = parse_int_range(args.thresholds)
+    stats = None
+    if args.rule == "max_deficit":
+        from margin_store import comeback_stats
+
+        stats = comeback_stats()
+    table = {}
+    for csv_file in args.csv_files:
+        df = pd.read_csv(csv_file)
+        if args.rule == "halftime":
+            counts, _ = sweep_thresholds(df, thresholds)
+        else:
+            counts = pd.Series([len(select_comebacks(df, t, "max_deficit", stats)) for t in thresholds],
+                               index=thresholds, name='Comebacks')
+        table[os.path.basename(csv_file)] = counts
+    print(pd.DataFrame(table).to_string())
@@ -8,6 +8,9 @@
 import pandas as pd
 import os
 
+from comeback_analysis import select_comebacks
+from normalize_games import NORMALIZED_COLUMNS, normalize_games
+
 # --- Configuration ---
 # Define the input CSV file. (Make sure to replace 'YOUR_FILE_NAME.csv' with the actual file name, and the .csv is in the same folder as this script.)
 INPUT_CSV = "YOUR_FILE_NAME.csv"
@@ -15,15 +18,20 @@ INPUT_CSV = "YOUR_FILE_NAME.csv"
 # Define the comeback threshold.
 THRESHOLD = 18
 
-def find_comebacks(league_name, input_csv, threshold):
+# Define the comeback rule: "halftime" for the halftime deficit, or "max_deficit" for the largest deficit
+# the winner overcame at any point of the game (needs the margin store, see margin_store.py).
+RULE = "halftime"
+
+def find_comebacks(league_name, input_csv, threshold, rule="halftime"):
     """
     Reads a CSV file, calculates comeback metrics, and filters for candidates.
 
     Args:
         league_name (str): The name of the league (e.g., "WNBA").
         input_csv (str): The path to the input CSV file for the specified league.
-        threshold (int): The minimum halftime deficit in points for a game to be
+        threshold (int): The minimum deficit in points for a game to be
                          considered a "comeback candidate."
+        rule (str): "halftime" or "max_deficit", see comeback_analysis.select_comebacks().
     """
     print(f"--- Analyzing {league_name} Data ---")
 
@@ -38,44 +46,25 @@ def find_comebacks(league_name, input_csv, threshold):
     print(f"Successfully read {len(df)} games from '{input_csv}'.")
 
     # --- Data Preparation for Analysis ---
-    # Extract the full date from the Game_URL column.
-    # The regex extracts 8 digits (YYYYMMDD) followed by 3 digits and 3 uppercase letters, then '.html'.
-    # This ensures we get the date part of the URL consistently.
-    # .iloc[:, 0] selects the first (and only) captured group.
-    # Convert the extracted date string to datetime objects and then format them as 'YYYY-MM-DD'.
-    df['Game_Date'] = df['Game_URL'].str.extract(r'(\d{8})\d{3}[A-Z]{3}\.html').iloc[:, 0]
-    df['Game_Date'] = pd.to_datetime(df['Game_Date'], format='%Y%m%d').dt.strftime('%Y-%m-%d')
-
-    # Calculate the absolute difference in halftime scores to get the deficit amount.
-    df['Halftime_Deficit_Amount'] = abs(df['Halftime_Score_Home'] - df['Halftime_Score_Away'])
-
-    # Determine which team was trailing at halftime.
-    # If the home team's halftime score is less than the away team's, the home team was trailing.
-    # Otherwise, the away team was trailing.
-    df['Trailing_Team_Halftime'] = df.apply(
-        lambda row: row['Home_Team'] if row['Halftime_Score_Home'] < row['Halftime_Score_Away'] else row['Away_Team'],
-        axis=1
-    )
-
-    # --- Analysis: Filter for Potential Comebacks ---
-    # Filter the DataFrame to include only games where the halftime deficit meets or exceeds the specified threshold.
-    potential_comebacks = df[df['Halftime_Deficit_Amount'] >= threshold].copy()
-
-    # --- Analysis: Identify Successful Comebacks ---
-    # Filter the 'potential_comebacks' DataFrame further to identify games where the trailing team actually won.
-    # This involves two conditions:
-    # 1. The trailing team was the Home_Team, AND the Home_Team's Final_Score is greater than the Away_Team's.
-    # 2. The trailing team was the Away_Team, AND the Away_Team's Final_Score is greater than the Home_Team's.
-    successful_comebacks = potential_comebacks[
-        ((potential_comebacks['Trailing_Team_Halftime'] == potential_comebacks['Home_Team']) & (potential_comebacks['Final_Score_Home'] > potential_comebacks['Final_Score_Away'])) |
-        ((potential_comebacks['Trailing_Team_Halftime'] == potential_comebacks['Away_Team']) & (potential_comebacks['Final_Score_Away'] > potential_comebacks['Final_Score_Home']))
-    ].copy()
+    # Files exported by the checkpoint store already hold the game date, home-team code and game sequence
+    # taken from Game_URL, so only their types are restored. Older files get them derived from Game_URL in
+    # one vectorized pass. Either way Game_Date is a real date that can be filtered and sorted on directly.
+    df = normalize_games(df)
+
+    # --- Analysis: Filter for Successful Comebacks ---
+    # comeback_analysis computes the halftime deficit and trailing team for every game at once, then keeps the
+    # games where the deficit meets or exceeds the threshold and the trailing team went on to win.
+    # Under the max_deficit rule it keeps the games whose winner overcame at least that deficit at any point.
+    successful_comebacks = select_comebacks(df, threshold, rule)
+    deficit_column = 'Halftime_Deficit_Amount' if rule == "halftime" else 'Max_Deficit_Overcome'
 
     # --- Output Results ---
     # Check if any successful comebacks were found.
     if not successful_comebacks.empty:
         # Sort the successful comebacks by the largest deficit first for easier review.
-        successful_comebacks.sort_values(by='Halftime_Deficit_Amount', ascending=False, inplace=True)
+        successful_comebacks.sort_values(by=deficit_column, ascending=False, inplace=True)
+        # The output keeps the columns it always had, with Game_Date as YYYY-MM-DD.
+        successful_comebacks.drop(columns=NORMALIZED_COLUMNS, inplace=True)
 
         # Define the output filename for the comeback candidates.
         output_filename = f"{league_name}_COMEBACK_CANDIDATES.csv"
@@ -88,9 +77,10 @@ def find_comebacks(league_name, input_csv, threshold):
         print("\nHere are the games:")
         # Print the relevant columns of the resulting table to the console.
         # .to_string() ensures all rows are printed without truncation.
+        team_column = 'Trailing_Team_Halftime' if rule == "halftime" else 'Comeback_Team'
         print(successful_comebacks[['Game_Date', 'Home_Team', 'Away_Team', 'Halftime_Score_Home',
                                      'Halftime_Score_Away', 'Final_Score_Home', 'Final_Score_Away',
-                                     'Trailing_Team_Halftime', 'Halftime_Deficit_Amount']].to_string())
+                                     team_column, deficit_column]].to_string())
     else:
         print(f"\nCOMPLETE. No games found for the {league_name} that met the {threshold}-point threshold for a comeback win.")
     print("-" * 30) # Separator for readability
@@ -100,4 +90,4 @@ if __name__ == '__main__':
     # This block ensures that the functions are called only when the script is executed directly.
     # Run the analysis for WNBA data using the defined threshold.
     # Replace "LEAGUE_NAME_HERE" with the actual league name ("NBA" or "WNBA").
-    find_comebacks("LEAGUE_NAME_HERE", INPUT_CSV, THRESHOLD)
+    find_comebacks("LEAGUE_NAME_HERE", INPUT_CSV, THRESHOLD, RULE)
@@ -0,0 +1,184 @@
+# ===================================================================
+# Headless Driver Pool
+# ===================================================================
+# Runs N long-lived headless Chrome drivers in separate processes,
+# all pulling box-score URLs from one shared queue. ChromeDriver is
+# resolved once up front, each driver is recycled after a fixed
+# number of pages, and a driver (or whole worker process) that
+# crashes is replaced so one bad page cannot stall the run. A driver
+# that fails to start fails only the page it was started for. Each
+# result carries the worker's stage timings (scrape_metrics.py), which
+# are merged into this process's METRICS.
+# ===================================================================
+
+import importlib
+import multiprocessing
+import queue
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+from html_cache import HtmlCache
+from retry_queue import classify_failure
+from scrape_metrics import METRICS
+
+# --- Configuration, change as needed ---
+DRIVER_POOL_SIZE = 4 # Number of Chrome workers running in parallel
+PAGES_PER_DRIVER = 50 # Restart each driver after this many pages to keep Chrome's memory in check
+WORKER_CHECK_INTERVAL = 5 # Seconds without any worker reporting back before the pool checks for dead workers
+MAX_IDLE_RESTARTS = 3 # Restarts of workers that died between pages (e.g. failing to start) before the pool gives up on them
+
+# Each league keeps its own driver setup (the WNBA one is stealthy), so the
+# workers import the matching scraper module and use its functions.
+SCRAPER_MODULES = {"NBA": "nba_scraper", "WNBA": "wnba_scraper"}
+
+
+def _driver_worker(worker_id, league, driver_path, pages_per_driver, cache_dir, url_queue, result_queue):
+    """
+    Worker process loop: takes URLs off url_queue until it gets None, scraping each
+    with the league's scrape_game_with_driver() and reporting back on result_queue.
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    scraper = importlib.import_module(SCRAPER_MODULES[league])
+    METRICS.forward() # Stage timings travel back with each result
+    cache = HtmlCache(cache_dir) if cache_dir else None
+    driver = None
+    pages_on_driver = 0
+
+    while True:
+        url = url_queue.get()
+        if url is None:
+            break
+
+        result_queue.put(("started", worker_id, url, None, None))
+        crashed = False
+        try:
+            if driver is None:
+                with METRICS.stage("driver_setup"):
+                    driver = scraper.setup_driver(driver_path=driver_path, headless=True)
+                pages_on_driver = 0
+            with METRICS.stage("browser_page", url):
+                game_info = scraper.scrape_game_with_driver(driver, url, cache=cache)
+            result_queue.put(("done", worker_id, url, game_info, METRICS.take_forwarded()))
+        except Exception as e:
+            # Timeouts and lost browser sessions leave Chrome in an unknown state, so start fresh.
+            # A driver that failed to start is simply tried again on the next URL.
+            crashed = isinstance(e, WebDriverException)
+            result_queue.put(("failed", worker_id, url, (classify_failure(e), repr(e)), METRICS.take_forwarded()))
+
+        pages_on_driver += 1
+        if driver is not None and (crashed or pages_on_driver >= pages_per_driver):
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = None
+
+    if driver is not None:
+        driver.quit()
+
+
+def scrape_with_pool(urls, league, on_game=None, workers=DRIVER_POOL_SIZE, pages_per_driver=PAGES_PER_DRIVER,
+                     cache_dir=None, on_failure=None):
+    """
+    Scrapes box scores with a pool of headless Chrome workers.
+
+    Args:
+        urls (list): Box-score URLs to scrape.
+        league (str): "NBA" or "WNBA", picks the driver setup and line score IDs.
+        on_game (callable): Optional callback run in this process with each scraped game row.
+        workers (int): Number of Chrome worker processes.
+        pages_per_driver (int): Pages each driver handles before it is restarted.
+        cache_dir (str): Optional HTML cache folder the workers store every loaded page in.
+        on_failure (callable): Optional callback run with (url, failure_class, error) for each failed
+                               page, e.g. RetryQueue.record.
+
+    Returns:
+        tuple: (games, failed_urls).
+    """
+    if not urls:
+        return [], []
+
+    print(f"Resolving ChromeDriver once for {workers} worker(s)...")
+    driver_path = ChromeDriverManager().install()
+
+    context = multiprocessing.get_context("spawn")
+    url_queue = context.Queue()
+    result_queue = context.Queue()
+    for url in urls:
+        url_queue.put(url)
+
+    def start_worker(worker_id):
+        process = context.Process(target=_driver_worker, daemon=True,
+                                  args=(worker_id, league, driver_path, pages_per_driver, cache_dir,
+                                        url_queue, result_queue))
+        process.start()
+        return process
+
+    workers = max(1, min(workers, len(urls)))
+    processes = {worker_id: start_worker(worker_id) for worker_id in range(workers)}
+    for _ in processes:
+        url_queue.put(None) # One stop signal per worker, queued behind all the URLs
+
+    games = []
+    failed_urls = []
+    in_flight = {}
+    unreported = list(urls)
+    idle_restarts = 0
+
+    def fail(url, failure_class, error):
+        METRICS.count("failures", failure_class)
+        failed_urls.append(url)
+        unreported.remove(url)
+        if on_failure:
+            on_failure(url, failure_class, error)
+
+    try:
+        while unreported:
+            try:
+                status, worker_id, url, payload, samples = result_queue.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                # A worker that died never reports back. Fail the URL it was on, if any, and replace it.
+                # Workers that exit cleanly have taken their stop signal and are not replaced.
+                for worker_id, process in list(processes.items()):
+                    if process.is_alive() or process.exitcode == 0:
+                        continue
+                    url = in_flight.pop(worker_id, None)
+                    if url is not None:
+                        print(f"---! Worker {worker_id} died on {url}. Restarting it.")
+                        fail(url, "browser_crash", "worker process died")
+                    elif idle_restarts < MAX_IDLE_RESTARTS:
+                        print(f"---! Worker {worker_id} exited with code {process.exitcode}. Restarting it.")
+                        idle_restarts += 1
+                    else:
+                        continue
+                    processes[worker_id] = start_worker(worker_id)
+                if unreported and not any(process.is_alive() for process in processes.values()):
+                    print(f"---! No driver worker is left, failing the {len(unreported)} remaining pages.")
+                    for url in list(unreported):
+                        fail(url, "browser_crash", "no driver worker left")
+                continue
+
+            if status == "started":
+                in_flight[worker_id] = url
+                continue
+
+            in_flight.pop(worker_id, None)
+            METRICS.merge(samples)
+            if status == "done":
+                unreported.remove(url)
+                METRICS.count_game()
+                games.append(payload)
+                if on_game:
+                    on_game(payload)
+            else:
+                failure_class, error = payload
+                print(f"---! FAILED on {url} ({failure_class}). Error: {error}")
+                fail(url, failure_class, error)
+    finally:
+        for process in processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    return games, failed_urls
@@ -0,0 +1,297 @@
+# ===================================================================
+# Concurrent Fetch Engine
+# ===================================================================
+# Pulls box-score pages straight over HTTP with asyncio instead of
+# loading each one in Chrome. A handful of connections run at once,
+# but every host gets a request budget so basketball-reference.com
+# never sees more than REQUESTS_PER_MINUTE requests from us. Pages
+# that cannot be parsed from the static HTML are handed back so the
+# scraper can retry them through Selenium. Pages already in the
+# HTML cache are served from disk without any request at all.
+# By default the budget adapts (see rate_limiter.py): it speeds up
+# while pages come back and backs off on 429s and timeouts, which
+# are retried a few times before the page is given up on. Budget
+# waits, requests, parsing and cache writes are timed in METRICS
+# (see scrape_metrics.py).
+# ===================================================================
+
+import argparse
+import asyncio
+import glob
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from box_score import parse_box_score
+from rate_limiter import START_PER_MINUTE, AdaptiveRateLimiter
+from retry_queue import TRANSIENT_FAILURES, classify_failure
+from scrape_metrics import METRICS
+
+# --- Configuration, change as needed ---
+SITE_ROOT = "https://www.basketball-reference.com"
+MAX_CONCURRENT_REQUESTS = 4 # Maximum number of connections open at the same time
+REQUESTS_PER_MINUTE = 20 # Per-host budget, basketball-reference.com blocks clients that go over 20/min
+REQUEST_TIMEOUT = 20 # Seconds before a single request is abandoned
+FETCH_ATTEMPTS = 4 # Tries per page when the request is throttled or times out
+ADAPTIVE_RATE = True # Adapt the per-host rate to how the site answers, with REQUESTS_PER_MINUTE as the ceiling
+THROTTLE_STATUSES = {429, 503} # Responses that mean "slow down"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+class Throttled(Exception):
+    """The server answered 429/503, optionally telling us how many seconds to wait (Retry-After)."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}" + (f", retry after {retry_after}s" if retry_after else ""))
+        self.status = status
+        self.retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+class HostRateBudget:
+    """
+    Spaces out requests per host so each host sees at most `per_minute` requests a minute.
+    A per_minute of 0 (or None) turns the budget off, which is handy against the local stub site.
+    """
+
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, host):
+        """Waits until the next request slot for `host` opens up."""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def record_success(self, host):
+        """The fixed budget does not care how requests went."""
+
+    def record_throttle(self, host, retry_after=None):
+        """The fixed budget does not care how requests went."""
+
+
+def rewrite_url(url, base_url):
+    """Points a basketball-reference.com URL at another host (e.g. the local stub site)."""
+    if not base_url:
+        return url
+    return base_url.rstrip('/') + url[len(SITE_ROOT):] if url.startswith(SITE_ROOT) else url
+
+
+class Fetcher:
+    """
+    Shared HTTP client: one session, one connection limit and one per-host budget for everything
+    fetched through it, so several scrape jobs can share a single request budget.
+    Use it as an async context manager.
+
+    With an HtmlCache, cached pages are returned without a request and fetched pages are stored.
+    With cache_only=True, pages missing from the cache raise KeyError instead of being fetched.
+    With adaptive=True (and a per_minute limit) the budget is an AdaptiveRateLimiter capped at
+    per_minute, otherwise a fixed HostRateBudget.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENT_REQUESTS, per_minute=REQUESTS_PER_MINUTE,
+                 base_url=None, budget=None, cache=None, cache_only=False, adaptive=ADAPTIVE_RATE):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        if budget is None:
+            budget = (AdaptiveRateLimiter(min(START_PER_MINUTE, per_minute), max_per_minute=per_minute)
+                      if adaptive and per_minute else HostRateBudget(per_minute))
+        self.budget = budget
+        self.base_url = base_url
+        self.cache = cache
+        self.cache_only = cache_only
+        self.session = None
+
+    async def __aenter__(self):
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self.session = aiohttp.ClientSession(timeout=timeout, headers={"User-Agent": USER_AGENT})
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def fetch(self, url, use_cache=True):
+        """
+        Returns the HTML for `url`, from the cache when possible. Pass use_cache=False for pages
+        that change over time (e.g. a schedule page during the season); they are still cached.
+        """
+        if self.cache is not None and (use_cache or self.cache_only):
+            with METRICS.stage("cache_read"):
+                html = self.cache.get(url)
+            if html is not None:
+                METRICS.count("cache_hits")
+                return html
+        if self.cache_only:
+            raise KeyError(f"{url} is not in the HTML cache")
+
+        request_url = rewrite_url(url, self.base_url)
+        host = urlsplit(request_url).netloc
+        for attempt in range(1, FETCH_ATTEMPTS + 1):
+            try:
+                async with self.semaphore:
+                    with METRICS.stage("budget_wait"):
+                        await self.budget.acquire(host)
+                    with METRICS.stage("http", url):
+                        async with self.session.get(request_url) as response:
+                            if response.status in THROTTLE_STATUSES:
+                                raise Throttled(response.status, response.headers.get("Retry-After"))
+                            response.raise_for_status()
+                            html = await response.text()
+            except (Throttled, asyncio.TimeoutError) as e:
+                # Tell the budget to back off, then try again until the attempts run out.
+                METRICS.count("http_retries", f"HTTP {e.status}" if isinstance(e, Throttled) else "timeout")
+                self.budget.record_throttle(host, getattr(e, 'retry_after', None))
+                if attempt == FETCH_ATTEMPTS:
+                    raise
+            else:
+                self.budget.record_success(host)
+                break
+        if self.cache is not None:
+            with METRICS.stage("cache_write"):
+                self.cache.put(url, html)
+        return html
+
+
+async def fetch_pages(urls, on_page, fetcher=None, **fetch_options):
+    """
+    Fetches every URL concurrently and calls on_page(url, html, error) as each one finishes.
+    Exactly one of html/error is set. `url` is always the original basketball-reference URL,
+    even when base_url redirects the request somewhere else.
+
+    Uses `fetcher` if given, otherwise opens a Fetcher built from fetch_options (max_concurrency,
+    per_minute, base_url, budget, cache, cache_only) for just these URLs.
+    """
+    if fetcher is None:
+        async with Fetcher(**fetch_options) as fetcher:
+            return await fetch_pages(urls, on_page, fetcher)
+
+    async def worker(url):
+        try:
+            html = await fetcher.fetch(url)
+        except Exception as e:
+            on_page(url, None, e)
+        else:
+            on_page(url, html, None)
+
+    await asyncio.gather(*(worker(url) for url in urls))
+
+
+async def scrape_games_async(urls, league, on_game=None, fetcher=None, retry_queue=None, browser_fallback=True,
+                             **fetch_options):
+    """Coroutine version of scrape_games(), for callers already running an event loop."""
+    games = []
+    needs_browser = []
+
+    def handle_page(url, html, error):
+        if error is None:
+            try:
+                with METRICS.stage("parse"):
+                    game_info = parse_box_score(html, league, url)
+            except Exception as e:
+                error = e
+            else:
+                METRICS.count_game()
+                games.append(game_info)
+                if on_game:
+                    on_game(game_info)
+                return
+        failure_class = classify_failure(error)
+        METRICS.count("failures", failure_class)
+        if retry_queue is not None and failure_class in TRANSIENT_FAILURES:
+            # The browser would hit the same throttling, so these wait for the next run instead.
+            retry_queue.record(url, failure_class, error)
+            print(f"---! {failure_class} on {url}, queued for a later retry. Error: {error}")
+            return
+        if not browser_fallback:
+            if retry_queue is not None:
+                retry_queue.record(url, failure_class, error)
+            print(f"---! Static fetch failed on {url} ({failure_class}). Error: {error}")
+        else:
+            # Recorded by the browser only if it fails there too, so one run counts as one attempt.
+            print(f"---! Static fetch failed on {url} ({failure_class}), leaving it for the browser. Error: {error}")
+        needs_browser.append(url)
+
+    await fetch_pages(urls, handle_page, fetcher, **fetch_options)
+    return games, needs_browser
+
+
+def scrape_games(urls, league, on_game=None, retry_queue=None, browser_fallback=True, **fetch_options):
+    """
+    Scrapes box scores from static HTML.
+
+    Args:
+        urls (list): Box-score URLs to scrape.
+        league (str): "NBA" or "WNBA".
+        on_game (callable): Optional callback run with each game row as soon as it is parsed.
+        retry_queue (RetryQueue): Optional queue failures are recorded in. Throttled and timed out
+                                  pages then stay in the queue instead of going to the browser.
+        browser_fallback (bool): Whether the caller loads needs_browser with Selenium, which records
+                                 the pages that fail there. If False, those failures are recorded here.
+        **fetch_options: Passed through to Fetcher (max_concurrency, per_minute, base_url,
+                         budget, cache, cache_only, adaptive).
+
+    Returns:
+        tuple: (games, needs_browser) where games is a list of game rows and needs_browser
+               lists the URLs that could not be fetched or parsed and should go through Selenium.
+    """
+    return asyncio.run(scrape_games_async(urls, league, on_game, retry_queue=retry_queue,
+                                          browser_fallback=browser_fallback, **fetch_options))
+
+
+def saved_box_score_urls(root, league):
+    """Lists the box-score URLs for every page saved under a stub-site folder."""
+    prefix = "wnba/boxscores" if league == "WNBA" else "boxscores"
+    paths = sorted(glob.glob(os.path.join(root, prefix, "*.html")))
+    return [f"{SITE_ROOT}/{prefix}/{os.path.basename(path)}" for path in paths]
+
+
+if __name__ == '__main__':
+    # Measures games per minute against a local stub site serving saved box-score pages.
+    from stub_server import start_stub_server
+
+    parser = argparse.ArgumentParser(description="Time the fetch engine against saved box-score pages.")
+    parser.add_argument("pages", help="Folder of saved pages laid out like the site (e.g. pages/boxscores/*.html)")
+    parser.add_argument("--league", default="NBA", choices=["NBA", "WNBA"])
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--per-minute", type=float, default=0,
+                        help="Host budget, 0 = unlimited. With --adaptive it is the ceiling")
+    parser.add_argument("--adaptive", action="store_true", help="Use the adaptive rate limiter")
+    parser.add_argument("--start-rate", type=float, default=START_PER_MINUTE, help="Adaptive starting rate per minute")
+    parser.add_argument("--latency", type=float, default=0.2, help="Artificial server delay in seconds")
+    parser.add_argument("--throttle", type=float, default=0, help="Stub site answers 429 above this many requests/min")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests the stub site fails with 503")
+    args = parser.parse_args()
+
+    urls = saved_box_score_urls(args.pages, args.league)
+    if not urls:
+        print(f"No saved box-score pages found under '{args.pages}'.")
+    else:
+        server, base_url = start_stub_server(args.pages, latency=args.latency, throttle_per_minute=args.throttle,
+                                             error_rate=args.error_rate)
+        budget = HostRateBudget(args.per_minute)
+        if args.adaptive:
+            budget = AdaptiveRateLimiter(args.start_rate, max_per_minute=args.per_minute or float('inf'))
+        try:
+            METRICS.reset()
+            start = time.perf_counter()
+            games, needs_browser = scrape_games(urls, args.league, max_concurrency=args.concurrency,
+                                                budget=budget, base_url=base_url)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+        print(f"Parsed {len(games)}/{len(urls)} games in {elapsed:.2f}s "
+              f"({len(games) / elapsed * 60:.0f} games/min), {len(needs_browser)} need the browser.")
+        if server.throttle is not None:
+            print(f"The stub site throttled {server.throttle.rejected} requests.")
+        if args.adaptive:
+            host = urlsplit(base_url).netloc
+            print(f"Adaptive rate ended at {budget.rate(host):.0f}/min after {budget.successes} successes "
+                  f"and {budget.throttled} throttled or timed out requests.")
+        print(METRICS.summary())
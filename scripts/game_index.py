@@ -0,0 +1,269 @@
+# ===================================================================
+# Game Index
+# ===================================================================
+# Links the three datasets of the project per game without any manual
+# matching: box-score rows (keyed by Game_URL), play-by-play metric
+# rows (Game ID / PBP Link) and media article rows (Game ID plus team
+# names). Every team spelling in use ("SAC", "ATL_N", "LOS",
+# "Sacramento Kings", "LA Clippers", "Kings") is resolved through one
+# alias table to basketball-reference's team code, and every game gets
+# the composite key (league, date, home code, away code).
+#
+# GameIndex keeps plain dicts from that key, from Game_URL, from
+# Game ID and from the unordered matchup to each game, so a lookup
+# costs one hash probe, and join() links all three tables with hash
+# joins on the key (linear in the number of rows) instead of nested
+# scans. Article dates that are publication dates (a day after the
+# game) are matched by also trying the previous day.
+#
+# Usage: python game_index.py [-o joined_games.csv]
+# ===================================================================
+
+import argparse
+import glob
+import os
+import re
+
+import pandas as pd
+
+from aggregate_text_data import COLUMN_FIXES, DATE_FORMAT
+from normalize_games import BOX_SCORE_URL_PATTERN
+
+# --- Configuration, change as needed ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+BOX_SCORE_FILES = sorted(glob.glob(os.path.join(DATA_DIR, "raw", "*_raw_data_*_bball_ref.csv")))
+PBP_FILE = os.path.join(DATA_DIR, "processed", "pbp_wnba_nba_data.csv")
+ARTICLE_FILE = os.path.join(DATA_DIR, "processed", "bothleague_aggregated_text_data.csv")
+PUBLICATION_LAG_DAYS = 1 # Article dates may be up to this many days after the game
+
+TEAMS = {
+    "NBA": {
+        "ATL": "Atlanta Hawks", "BOS": "Boston Celtics", "BRK": "Brooklyn Nets", "CHI": "Chicago Bulls",
+        "CHO": "Charlotte Hornets", "CLE": "Cleveland Cavaliers", "DAL": "Dallas Mavericks",
+        "DEN": "Denver Nuggets", "DET": "Detroit Pistons", "GSW": "Golden State Warriors",
+        "HOU": "Houston Rockets", "IND": "Indiana Pacers", "LAC": "Los Angeles Clippers",
+        "LAL": "Los Angeles Lakers", "MEM": "Memphis Grizzlies", "MIA": "Miami Heat", "MIL": "Milwaukee Bucks",
+        "MIN": "Minnesota Timberwolves", "NOP": "New Orleans Pelicans", "NYK": "New York Knicks",
+        "OKC": "Oklahoma City Thunder", "ORL": "Orlando Magic", "PHI": "Philadelphia 76ers",
+        "PHO": "Phoenix Suns", "POR": "Portland Trail Blazers", "SAC": "Sacramento Kings",
+        "SAS": "San Antonio Spurs", "TOR": "Toronto Raptors", "UTA": "Utah Jazz", "WAS": "Washington Wizards",
+    },
+    "WNBA": {
+        "ATL": "Atlanta Dream", "CHI": "Chicago Sky", "CON": "Connecticut Sun", "DAL": "Dallas Wings",
+        "GSV": "Golden State Valkyries", "IND": "Indiana Fever", "LAS": "Los Angeles Sparks",
+        "LVA": "Las Vegas Aces", "MIN": "Minnesota Lynx", "NYL": "New York Liberty", "PHO": "Phoenix Mercury",
+        "SEA": "Seattle Storm", "WAS": "Washington Mystics",
+    },
+}
+
+# Spellings that are neither a code, a full name nor a nickname (the last word of the full name).
+EXTRA_ALIASES = {
+    "NBA": {"ATL_N": "ATL", "LA Clippers": "LAC", "LA Lakers": "LAL", "BKN": "BRK", "CHA": "CHO", "PHX": "PHO",
+            "Trail Blazers": "POR", "Sixers": "PHI"},
+    "WNBA": {"ATL_W": "ATL", "LOS": "LAS", "LA Sparks": "LAS", "LV Aces": "LVA", "PHX": "PHO"},
+}
+
+KEY_COLUMNS = ["League", "Date", "Home_Code", "Away_Code"]
+
+
+def _alias_key(name):
+    return re.sub(r"\s+", " ", str(name)).strip().casefold()
+
+
+def build_alias_table():
+    """(league, folded spelling) -> team code, from TEAMS and EXTRA_ALIASES."""
+    aliases = {}
+    for league, teams in TEAMS.items():
+        for code, full_name in teams.items():
+            for alias in (code, full_name, full_name.split()[-1]):
+                aliases[(league, _alias_key(alias))] = code
+        for alias, code in EXTRA_ALIASES[league].items():
+            aliases[(league, _alias_key(alias))] = code
+    return aliases
+
+
+TEAM_ALIASES = build_alias_table()
+
+
+def team_code(league, name):
+    """basketball-reference code of a team spelled any known way, or None if it is not in the alias table."""
+    if name is None or pd.isna(name):
+        return None
+    return TEAM_ALIASES.get((league, _alias_key(name)))
+
+
+def team_codes(leagues, names):
+    """team_code() over two aligned columns. Returns an object Series (None where unknown)."""
+    return pd.Series([team_code(league, name) for league, name in zip(leagues, names)], index=names.index,
+                     dtype=object)
+
+
+def league_of_urls(urls):
+    return pd.Series(["WNBA" if "/wnba/" in url else "NBA" for url in urls.astype(str)], index=urls.index)
+
+
+def box_score_keys(box_scores):
+    """
+    Adds the game key columns to box-score rows (*_raw_data_*.csv): the league and date come from
+    Game_URL, the home code from Game_URL and the away code from Away_Team through the alias table.
+    """
+    df = box_scores.copy()
+    parts = df['Game_URL'].astype(str).str.extract(BOX_SCORE_URL_PATTERN)
+    df['League'] = league_of_urls(df['Game_URL'])
+    df['Date'] = pd.to_datetime(parts['date'], format='%Y%m%d', errors='coerce')
+    df['Home_Code'] = parts['home']
+    df['Away_Code'] = team_codes(df['League'], df['Away_Team'])
+    return df
+
+
+def pbp_keys(pbp):
+    """
+    Adds the game key columns to play-by-play metric rows (pbp_wnba_nba_data.csv). Date and home
+    code come from the PBP Link; the away team is whichever of CBT/OPP is not the home team.
+    """
+    df = pbp.copy()
+    box_score_urls = df['PBP Link'].astype(str).str.replace("/boxscores/pbp/", "/boxscores/", regex=False)
+    parts = box_score_urls.str.extract(BOX_SCORE_URL_PATTERN)
+    df['Game_URL'] = box_score_urls
+    df['Date'] = pd.to_datetime(parts['date'], format='%Y%m%d', errors='coerce')
+    df['Home_Code'] = parts['home']
+    cbt = team_codes(df['League'], df['Comeback Team (CBT)'])
+    opp = team_codes(df['League'], df['Opponent Team (OPP)'])
+    df['Away_Code'] = cbt.where(cbt != df['Home_Code'], opp)
+    return df
+
+
+class GameIndex:
+    """
+    Hash indexes over the box-score rows of one or more seasons. Every lookup is a dict probe.
+
+    Attributes:
+        games (pd.DataFrame): Box-score rows with the key columns, in the order they were added.
+        by_key (dict): (league, date, home, away) -> row position in `games`.
+        by_url (dict): Game_URL -> row position.
+        by_matchup (dict): (league, date, frozenset of the two codes) -> row position.
+        by_game_id (dict): Game ID of the PBP/text datasets -> row position, filled by link_pbp().
+    """
+
+    def __init__(self, box_scores):
+        self.games = box_score_keys(box_scores).reset_index(drop=True)
+        self.by_key = {}
+        self.by_url = {}
+        self.by_matchup = {}
+        self.by_game_id = {}
+        columns = [self.games[column] for column in KEY_COLUMNS + ['Game_URL']]
+        for position, (league, date, home, away, url) in enumerate(zip(*columns)):
+            if pd.isna(date):
+                continue
+            self.by_key[(league, date, home, away)] = position
+            self.by_url[url] = position
+            self.by_matchup[(league, date, frozenset((home, away)))] = position
+
+    def game(self, league=None, date=None, home=None, away=None, url=None, game_id=None):
+        """
+        The box-score row of one game, by composite key (team codes or any alias), Game_URL or
+        Game ID. Returns None if the game is not indexed.
+        """
+        if url is not None:
+            position = self.by_url.get(url)
+        elif game_id is not None:
+            position = self.by_game_id.get(game_id)
+        else:
+            key = (league, pd.Timestamp(date), team_code(league, home), team_code(league, away))
+            position = self.by_key.get(key)
+        return None if position is None else self.games.iloc[position]
+
+    def find_matchup(self, league, date, team_a, team_b, lag_days=PUBLICATION_LAG_DAYS):
+        """
+        Row position of the game between two teams (either home) on `date` or up to `lag_days`
+        before it, or None.
+        """
+        teams = frozenset((team_code(league, team_a), team_code(league, team_b)))
+        for days in range(lag_days + 1):
+            position = self.by_matchup.get((league, pd.Timestamp(date) - pd.Timedelta(days=days), teams))
+            if position is not None:
+                return position
+        return None
+
+    def link_pbp(self, pbp):
+        """
+        Adds the key columns to the play-by-play rows and records their Game IDs in by_game_id.
+        Returns the keyed rows; Game_URL is empty for games not in the index.
+        """
+        keyed = pbp_keys(pbp)
+        positions = [self.by_key.get(key) for key in zip(*(keyed[column] for column in KEY_COLUMNS))]
+        for game_id, position in zip(keyed['Game ID'], positions):
+            if position is not None:
+                self.by_game_id[game_id] = position
+        keyed['Game_URL'] = [self.games['Game_URL'].iat[p] if p is not None else None for p in positions]
+        return keyed
+
+    def link_articles(self, articles):
+        """
+        Adds the key columns and Game_URL to article rows (bothleague_aggregated_text_data.csv or
+        the raw snippet files, whose column names are fixed as in aggregate_text_data.py). Rows are
+        resolved by Game ID when link_pbp() has seen it, otherwise by league, teams and date
+        through find_matchup().
+        """
+        df = articles.rename(columns=COLUMN_FIXES)
+        dates = pd.to_datetime(df['Game Date'], format=DATE_FORMAT, errors='coerce')
+        positions = []
+        for game_id, league, date, cbt, opp in zip(df['Game ID'], df['League'], dates, df['Comeback Team (CBT)'],
+                                                   df['Opponent Team (OPP)']):
+            position = self.by_game_id.get(game_id)
+            if position is None and not pd.isna(date):
+                position = self.find_matchup(league, date, cbt, opp)
+                if position is not None:
+                    self.by_game_id.setdefault(game_id, position)
+            positions.append(position)
+        rows = [self.games.iloc[p][KEY_COLUMNS + ['Game_URL']] if p is not None else None for p in positions]
+        keys = pd.DataFrame([row.to_dict() if row is not None else {} for row in rows], index=df.index,
+                            columns=KEY_COLUMNS + ['Game_URL'])
+        return pd.concat([df.drop(columns=[c for c in keys.columns if c in df]), keys], axis=1)
+
+    def join(self, pbp, articles):
+        """
+        Links every article to its play-by-play metrics and box score with hash joins on Game_URL.
+        Games that are not in the box scores are matched to their play-by-play metrics by Game ID.
+
+        Returns:
+            pd.DataFrame: One row per article with the article columns, the PBP metric columns
+                          (suffixed ' (PBP)' where the names clash) and the box-score columns.
+        """
+        pbp = self.link_pbp(pbp)
+        articles = self.link_articles(articles)
+        # Unlinked rows all have a null Game_URL, so they are joined on their Game ID instead.
+        pbp_key = pbp['Game_URL'].fillna("Game ID " + pbp['Game ID'].astype(str))
+        article_key = articles['Game_URL'].fillna("Game ID " + articles['Game ID'].astype(str))
+        pbp = pbp.drop(columns=['Game_URL', 'Game ID', 'League', 'Comeback Team (CBT)', 'Opponent Team (OPP)',
+                                'Game Date'] + [c for c in KEY_COLUMNS if c in pbp])
+        box_scores = self.games.drop(columns=[c for c in KEY_COLUMNS if c != 'Home_Code'] + ['Game_Date'],
+                                     errors='ignore')
+        joined = articles.merge(pbp, left_on=article_key.to_numpy(), right_on=pbp_key.to_numpy(), how='left',
+                                suffixes=("", " (PBP)"), validate='many_to_one').drop(columns='key_0')
+        return joined.merge(box_scores, on='Game_URL', how='left', suffixes=("", " (Box Score)"),
+                            validate='many_to_one')
+
+
+def load_box_scores(paths=BOX_SCORE_FILES):
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Link box scores, play-by-play metrics and media articles per game.")
+    parser.add_argument("-o", "--output", help="Write the joined table (one row per article) to this CSV")
+    args = parser.parse_args()
+
+    index = GameIndex(load_box_scores())
+    pbp = pd.read_csv(PBP_FILE)
+    articles = pd.read_csv(ARTICLE_FILE)
+    joined = index.join(pbp, articles)
+    print(f"Indexed {len(index.by_key)} box scores.")
+    print(f"Linked {len(index.by_game_id)} of {pbp['Game ID'].nunique()} play-by-play games and "
+          f"{joined['Game_URL'].notna().sum()} of {len(joined)} articles to a box score.")
+    missing = sorted(set(pbp['Game ID']) - set(index.by_game_id))
+    if missing:
+        print(f"Games not in the box-score files: {', '.join(missing)}")
+    if args.output:
+        joined.to_csv(args.output, index=False)
+        print(f"Wrote {len(joined)} rows to {args.output}")
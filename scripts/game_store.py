@@ -0,0 +1,140 @@
+# ===================================================================
+# Columnar Game Store
+# ===================================================================
+# Keeps the scraped game tables as a Parquet dataset partitioned by
+# league and season (data/store/<dataset>/league=NBA/season=2023/)
+# with compact types: categorical team names, small-int scores and a
+# real date column. The importer converts the existing CSVs, and the
+# loader reads back only the partitions and columns it is asked for,
+# memory-mapping the files instead of re-parsing text every run.
+#
+# Usage: python game_store.py import data/raw/*_bball_ref.csv data/processed/*_comeback_candidates_*.csv
+#        python game_store.py show
+# ===================================================================
+
+import argparse
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from normalize_games import normalize_games
+
+# --- Configuration, change as needed ---
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "store")
+
+# Maps the existing file names onto datasets, e.g. nba_raw_data_2023_bball_ref.csv -> games, NBA, 2023.
+CSV_NAME_PATTERN = re.compile(r"^(?P<league>w?nba)_(?P<kind>raw_data|comeback_candidates)_(?P<season>\d{4})", re.IGNORECASE)
+DATASETS = {"raw_data": "games", "comeback_candidates": "comeback_candidates"}
+
+SCORE_COLUMNS = ["Halftime_Score_Home", "Halftime_Score_Away", "Final_Score_Home", "Final_Score_Away",
+                 "Halftime_Deficit_Amount"]
+TEAM_COLUMNS = ["Home_Team", "Away_Team", "Trailing_Team_Halftime"]
+
+
+def to_store_frame(df):
+    """
+    Converts a games table read from CSV into the store's compact types. normalize_games() turns
+    Game_Date into a real date taken from the box-score URL (keeping the scraped text as
+    Game_Date_Text) and adds the Home_Code and Game_Seq columns.
+    """
+    df = normalize_games(df)
+    for column in SCORE_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('int16')
+    for column in TEAM_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    df['Game_URL'] = df['Game_URL'].astype('string')
+    return df
+
+
+def write_partition(df, dataset, league, season, store_dir=STORE_DIR):
+    """Writes one league/season partition of a dataset, replacing whatever was there before."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Store the date as a plain date rather than a nanosecond timestamp.
+    table = table.set_column(table.schema.get_field_index('Game_Date'), 'Game_Date',
+                             table.column('Game_Date').cast(pa.date32()))
+    table = table.append_column('league', pa.array([league] * len(table), pa.string()))
+    table = table.append_column('season', pa.array([season] * len(table), pa.int16()))
+    ds.write_dataset(table, os.path.join(store_dir, dataset), format='parquet',
+                     partitioning=ds.partitioning(pa.schema([('league', pa.string()), ('season', pa.int16())]),
+                                                  flavor='hive'),
+                     existing_data_behavior='delete_matching')
+
+
+def import_csv(csv_path, store_dir=STORE_DIR):
+    """
+    Imports one of the existing game CSVs, working out its dataset, league and season from the
+    file name. Returns (dataset, league, season, rows).
+    """
+    match = CSV_NAME_PATTERN.match(os.path.basename(csv_path))
+    if match is None:
+        raise ValueError(f"Cannot tell the league/season of '{csv_path}' from its name")
+    dataset = DATASETS[match['kind'].lower()]
+    league = match['league'].upper()
+    season = int(match['season'])
+
+    df = to_store_frame(pd.read_csv(csv_path))
+    write_partition(df, dataset, league, season, store_dir)
+    return dataset, league, season, len(df)
+
+
+def load_games(dataset="games", leagues=None, seasons=None, columns=None, store_dir=STORE_DIR, memory_map=True):
+    """
+    Loads games from the store.
+
+    Args:
+        dataset (str): "games" or "comeback_candidates".
+        leagues (list): Leagues to load, e.g. ["NBA"]. None loads all of them.
+        seasons (list): Seasons to load, e.g. [2023, 2024]. None loads all of them.
+        columns (list): Columns to read. None reads every column. Only these are read from disk.
+        store_dir (str): Root folder of the store.
+        memory_map (bool): Memory-map the Parquet files instead of reading them into buffers.
+
+    Returns:
+        pd.DataFrame: Teams come back as categoricals, scores as int16 and Game_Date as a date.
+    """
+    filters = []
+    if leagues:
+        filters.append(('league', 'in', [league.upper() for league in leagues]))
+    if seasons:
+        filters.append(('season', 'in', [int(season) for season in seasons]))
+    table = pq.read_table(os.path.join(store_dir, dataset), columns=columns, filters=filters or None,
+                          memory_map=memory_map, partitioning='hive')
+    return table.to_pandas(date_as_object=False)
+
+
+def list_partitions(store_dir=STORE_DIR):
+    """Returns a DataFrame with one row per dataset/league/season partition and its row count."""
+    partitions = []
+    for dataset in sorted(set(DATASETS.values())):
+        path = os.path.join(store_dir, dataset)
+        if not os.path.isdir(path):
+            continue
+        table = pq.read_table(path, columns=['league', 'season'], partitioning='hive')
+        counts = table.group_by(['league', 'season']).aggregate([([], 'count_all')]).to_pandas()
+        counts.insert(0, 'dataset', dataset)
+        partitions.append(counts.rename(columns={'count_all': 'games'}))
+    if not partitions:
+        return pd.DataFrame(columns=['dataset', 'league', 'season', 'games'])
+    return pd.concat(partitions).sort_values(['dataset', 'league', 'season']).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import game CSVs into the columnar store or list its contents.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import *_raw_data_* / *_comeback_candidates_* CSVs")
+    import_parser.add_argument("csv_files", nargs='+')
+    subparsers.add_parser("show", help="List the partitions in the store")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        for csv_file in args.csv_files:
+            dataset, league, season, rows = import_csv(csv_file)
+            print(f"Imported {rows} rows from '{csv_file}' into {dataset}/league={league}/season={season}")
+    else:
+        print(list_partitions().to_string(index=False))
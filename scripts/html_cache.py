@@ -0,0 +1,134 @@
+# ===================================================================
+# On-Disk HTML Cache
+# ===================================================================
+# Keeps every page the scrapers fetch (box scores, schedule month
+# pages, play-by-play pages) on disk so a parsing fix can be re-run
+# over a whole season without touching basketball-reference.com.
+# Pages are gzip-compressed and stored by the SHA-256 of their
+# content, with a small SQLite index mapping each URL to its blob.
+# When the cache outgrows MAX_CACHE_BYTES the least recently used
+# pages are dropped.
+# ===================================================================
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+# --- Configuration, change as needed ---
+CACHE_DIR = "html_cache" # Folder holding the compressed pages and their index
+MAX_CACHE_BYTES = 2 * 1024 ** 3 # Compressed size the cache may grow to before old pages are evicted (2 GB)
+
+
+class HtmlCache:
+    """
+    Content-addressed page cache keyed by URL.
+
+    Pages with identical HTML share one blob, so the size bound counts each distinct page once.
+    Safe to open from several processes at once (the driver pool does), since the index runs in WAL mode.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, digest TEXT NOT NULL, last_access REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS pages_by_access ON pages (last_access);
+            CREATE INDEX IF NOT EXISTS pages_by_digest ON pages (digest);
+        """)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest[2:] + ".html.gz")
+
+    def get(self, url):
+        """Returns the cached HTML for `url`, or None if it has not been cached."""
+        row = self.db.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with gzip.open(self._blob_path(row[0]), 'rt', encoding='utf-8') as f:
+                html = f.read()
+        except FileNotFoundError:
+            # The blob was removed behind the index's back, forget the entry.
+            with self.db:
+                self.db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            return None
+        with self.db:
+            self.db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        return html
+
+    def put(self, url, html):
+        """Stores the HTML for `url`, replacing any earlier version, then evicts if over the size bound."""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(temp_path, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(temp_path, path) # Atomic, so a reader never sees half a blob
+
+        with self.db:
+            old = self.db.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            self.db.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, os.path.getsize(path)))
+            self.db.execute("INSERT OR REPLACE INTO pages (url, digest, last_access) VALUES (?, ?, ?)",
+                            (url, digest, time.time()))
+            if old and old[0] != digest:
+                self._drop_blob_if_unused(old[0])
+        self.evict()
+
+    def __contains__(self, url):
+        return self.db.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone() is not None
+
+    def _drop_blob_if_unused(self, digest):
+        """Deletes a blob once no URL points at it. Must be called inside a transaction."""
+        if self.db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        self.db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def total_bytes(self):
+        """Compressed size of every blob in the cache."""
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self):
+        """Drops least recently used pages until the cache fits within max_bytes."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        with self.db:
+            for url, digest in self.db.execute("SELECT url, digest FROM pages ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                size = self.db.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                self._drop_blob_if_unused(digest)
+                if size and not self.db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                    total -= size[0]
+
+    def urls(self, prefix=""):
+        """Lists the cached URLs starting with `prefix`, sorted."""
+        rows = self.db.execute("SELECT url FROM pages WHERE url LIKE ? ORDER BY url", (prefix + "%",))
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+if __name__ == '__main__':
+    # Usage: python html_cache.py [cache_dir]  -- prints what the cache holds
+    cache = HtmlCache(sys.argv[1] if len(sys.argv) > 1 else CACHE_DIR)
+    urls = cache.urls()
+    print(f"{len(urls)} cached pages, {cache.total_bytes() / 1024 ** 2:.1f} MB compressed "
+          f"(limit {cache.max_bytes / 1024 ** 2:.0f} MB).")
+    cache.close()
@@ -0,0 +1,74 @@
+# ===================================================================
+# Lean Browser Mode
+# ===================================================================
+# Makes the Chrome drivers of both scrapers load only what the line
+# score needs. Images, CSS, fonts, ads and analytics are blocked
+# through the DevTools protocol (Network.setBlockedURLs, so Chrome
+# drops them itself without a round trip per request), driver.get()
+# returns at DOMContentLoaded (the "eager" page-load strategy)
+# instead of waiting for every subresource, and one execute_script()
+# call hands back just the scorebox and line-score nodes, a few KB,
+# instead of the whole driver.page_source. The fragment parses with
+# box_score.py like a full page, including a line score still inside
+# its HTML comment. Turn it on or off with LEAN_BROWSER in either
+# scraper, and compare both modes with bench_browser.py.
+# ===================================================================
+
+from box_score import LINE_SCORE_IDS
+
+# URL patterns Chrome refuses to load in lean mode ("*" matches anything).
+BLOCKED_URLS = [
+    # Images, stylesheets and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.css", "*.woff", "*.woff2", "*.ttf",
+    "*.otf",
+    # Ads, consent and analytics
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adservice.google.*", "*fundingchoicesmessages.google.com*", "*amazon-adsystem.com*", "*adnxs.com*",
+    "*pubmatic.com*", "*rubiconproject.com*", "*openx.net*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+    "*moatads.com*", "*scorecardresearch.com*", "*quantserve.com*", "*quantcount.com*", "*chartbeat.*",
+    "*hotjar.com*", "*facebook.net*", "*connatix.com*", "*doubleverify.com*", "*adsafeprotected.com*",
+]
+
+# Returns the scorebox date block, the page title and the line score wrapper (comment included)
+# as one HTML string, or null while the wrapper is not in the DOM yet.
+EXTRACT_SCRIPT = """
+const wrapper = document.getElementById(arguments[0]);
+if (!wrapper) return null;
+const parts = [];
+for (const selector of ['h1', '.scorebox_meta']) {
+    const node = document.querySelector(selector);
+    if (node) parts.push(node.outerHTML);
+}
+parts.push(wrapper.outerHTML);
+return '<html><body>' + parts.join('') + '</body></html>';
+"""
+
+
+def line_score_wrapper_id(league):
+    """ID of the div wrapping the line score ('all_line_score' for the NBA, 'all_line-score' for the WNBA)."""
+    return f"all_{LINE_SCORE_IDS[league]}"
+
+
+def apply_lean_options(chrome_options):
+    """Sets the eager page-load strategy and turns image decoding off on a ChromeOptions object."""
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--disable-extensions")
+    return chrome_options
+
+
+def block_requests(driver, patterns=BLOCKED_URLS):
+    """Makes a started Chrome driver refuse every request matching `patterns`."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def extract_box_score_html(driver, league):
+    """
+    Pulls the scorebox and line-score nodes of the loaded box-score page in one JS call.
+
+    Returns:
+        str: A small HTML document parse_box_score() can read, or None if the page has no
+             line score wrapper.
+    """
+    return driver.execute_script(EXTRACT_SCRIPT, line_score_wrapper_id(league))
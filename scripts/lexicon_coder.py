@@ -0,0 +1,278 @@
+# ===================================================================
+# Lexicon Auto-Coder
+# ===================================================================
+# Suggests the narrative codes of the *_raw_text_data.csv files from
+# the keyword lists of the codebook (docs/qualitative_data_codebook.pdf)
+# so hand coding can start from a pre-coded sheet. Every keyword and
+# phrase of LEXICON is compiled into one Aho-Corasick automaton over
+# words, so a snippet is scanned once no matter how many keywords
+# there are. Each match is given to the team mentioned nearest before
+# it (C for the comeback team, O for the opponent, C when no team is
+# named), and a code matched for both teams becomes "C/O", as in the
+# hand-coded files. Large corpora are split over a process pool.
+#
+# The suggestions are written in the same column layout as the input,
+# and --report compares them with the hand codes already in the file
+# (precision, recall, Cohen's kappa and C/O agreement per code).
+#
+# Usage: python lexicon_coder.py data/raw/nba_raw_text_data.csv -o nba_suggested_codes.csv
+#        python lexicon_coder.py data/raw/*_raw_text_data.csv --report
+# ===================================================================
+
+import argparse
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregate_text_data import CODE_COLUMNS, COLUMN_FIXES
+
+# --- Configuration, change as needed ---
+CHUNK_SIZE = 500 # Snippets per task sent to a worker process
+
+# Keywords of the codebook plus the phrases of its inclusion criteria, and a few comeback phrases
+# the hand coders consistently coded. Matching is case-insensitive, on whole words, and a final
+# "s" is also accepted.
+LEXICON = {
+    "ATT. Ind. Resilience": [
+        "grit", "resilient", "resilience", "toughness", "unyielding", "persisted", "fought", "tenacity",
+        "bounce back", "bounced back", "willpower", "mental", "iron will", "refused", "determination",
+        "refusal to quit", "persistence", "strong will", "overcame", "overcome", "erased", "dug down",
+        "rallied", "comeback",
+    ],
+    "ATT. Self-Efficacy": [
+        "belief", "confidence", "swagger", "conviction", "assured", "knew they could", "self-belief",
+        "certainty", "poise", "trust", "believed",
+    ],
+    "ATT. Team Efficacy/Cohesion": [
+        "cohesion", "united", "togetherness", "chemistry", "collective", "trust", "bond", "unified",
+        "teamwork", "synergy", "camaraderie", "together", "playing as one", "sticking together", "trusting each other",
+        "brotherhood", "sisterhood",
+    ],
+    "ATT. Verbal Persuasion": [
+        "coach's speech", "speech", "huddle", "timeout talk", "encouragement", "words", "leadership",
+        "rallying cry", "message", "talk", "told",
+    ],
+    "ATT. Emotional Reg.": [
+        "composure", "poise", "calm", "unflappable", "rattled", "nerves", "emotional control", "steady",
+        "level-headed", "unfazed", "cool under pressure", "panic", "panicked", "steadied",
+    ],
+    "AFT. Momentum Lang.": [
+        "momentum", "carried", "never looked back", "unstoppable", "surge", "seized control", "rolling",
+        "accelerated", "takeover", "dominance", "kept going", "steamrolled", "continued their run",
+        "shifted gears", "kept rolling", "took control", "rally", "pulled away", "closed the gap",
+        "trimmed", "cut the deficit", "extending their lead", "caught", "swing",
+    ],
+    "AFT. Draining Lang": [
+        "drained", "exhausted", "hit a wall", "fatigue", "ran out of gas", "sustain", "tired", "wore down",
+        "struggled", "lacked energy", "burnout", "tired legs", "lost intensity",
+    ],
+    "AFT. Perf. Outcome Lang.": [
+        "run", "turnover", "stops", "scored", "missed", "possession", "point", "field goal", "shot",
+        "basket", "defense", "offense", "stats", "rebound", "three-pointer", "3-pointer", "free throw",
+        "outscored", "lead",
+    ],
+    "Gendered Lang.": [
+        "feisty", "athleticism", "grace", "lady", "girl", "brotherhood", "sisterhood", "tough guys",
+        "female strength", "women's game", "masculine", "feminine",
+    ],
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CODED_VALUES = ("C", "O", "C/O")
+
+
+def tokenize(text):
+    """Lower-cased words of a text; 'self-belief' becomes ['self', 'belief'], "women's" stays one word."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexiconMatcher:
+    """
+    Aho-Corasick automaton whose alphabet is words instead of characters. Every state is a
+    keyword prefix; `fail` points to the longest proper suffix that is also a prefix, and
+    `output` lists the (code, keyword length) pairs that end in the state, including those
+    inherited through the failure chain.
+    """
+
+    def __init__(self, lexicon=LEXICON):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for code, phrases in lexicon.items():
+            for phrase in phrases:
+                words = tokenize(phrase)
+                self._add(words, code)
+                if not words[-1].endswith("s"):
+                    self._add(words[:-1] + [words[-1] + "s"], code)
+        self._link()
+
+    def _add(self, words, code):
+        state = 0
+        for word in words:
+            if word not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][word] = len(self.goto) - 1
+            state = self.goto[state][word]
+        if (code, len(words)) not in self.output[state]:
+            self.output[state].append((code, len(words)))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def matches(self, words):
+        """Yields (start word index, code) for every keyword occurrence in a tokenized text."""
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for i, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for code, length in output[state]:
+                yield i - length + 1, code
+
+
+def team_words(cbt, opp):
+    """Words naming only one of the two teams, e.g. 'sacramento'/'kings' -> 'C'."""
+    cbt_words = set(tokenize(cbt or ""))
+    opp_words = set(tokenize(opp or ""))
+    shared = cbt_words & opp_words
+    return {**{word: "O" for word in opp_words - shared}, **{word: "C" for word in cbt_words - shared}}
+
+
+def code_snippet(matcher, text, cbt, opp):
+    """
+    Suggests the codes of one snippet.
+
+    Returns:
+        dict: Code column -> 'C', 'O' or 'C/O', for the codes that matched.
+    """
+    words = tokenize(text)
+    sides = team_words(cbt, opp)
+    mentions = [(i, sides[word]) for i, word in enumerate(words) if word in sides]
+    codes = {}
+    for start, code in matcher.matches(words):
+        before = [side for i, side in mentions if i <= start]
+        after = [side for i, side in mentions if i > start]
+        side = before[-1] if before else after[0] if after else "C"
+        codes.setdefault(code, set()).add(side)
+    return {code: "C/O" if len(found) == 2 else found.pop() for code, found in codes.items()}
+
+
+_matcher = None
+
+
+def _code_chunk(rows):
+    global _matcher
+    if _matcher is None:
+        _matcher = LexiconMatcher()
+    return [code_snippet(_matcher, text, cbt, opp) for text, cbt, opp in rows]
+
+
+def code_column_names(columns):
+    """Maps each code of CODE_COLUMNS to its column in a file, which may carry one of the old typos."""
+    names = {COLUMN_FIXES.get(column, column): column for column in columns}
+    return {code: names.get(code, code) for code in CODE_COLUMNS}
+
+
+def suggest_codes(snippets, workers=None):
+    """
+    Suggests codes for every snippet of a *_raw_text_data.csv table.
+
+    Args:
+        snippets (pd.DataFrame): Rows with 'Snippet Text', 'Comeback Team (CBT)' and 'Opponent Team (OPP)'.
+        workers (int): Processes to spread the snippets over; 1 codes them in this process,
+                       None uses all CPUs.
+
+    Returns:
+        pd.DataFrame: A copy of `snippets` with every code column replaced by the suggestions
+                      (empty where nothing matched).
+    """
+    rows = list(zip(snippets["Snippet Text"].fillna("").astype(str), snippets["Comeback Team (CBT)"],
+                    snippets["Opponent Team (OPP)"]))
+    if workers == 1:
+        codes = _code_chunk(rows)
+    else:
+        chunks = [rows[i:i + CHUNK_SIZE] for i in range(0, len(rows), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            codes = [row for chunk in pool.map(_code_chunk, chunks) for row in chunk]
+
+    suggested = snippets.copy()
+    for code, column in code_column_names(snippets.columns).items():
+        suggested[column] = pd.Series([row.get(code) for row in codes], index=snippets.index, dtype=object)
+    return suggested
+
+
+def agreement_report(hand, suggested):
+    """
+    Compares suggested codes with hand codes, row by row.
+
+    Returns:
+        pd.DataFrame: Per code (and 'All codes'): rows coded by hand and by the coder, precision,
+                      recall and Cohen's kappa of code present/absent, and the share of rows coded
+                      by both where the C/O marker is the same.
+    """
+    rows = []
+    totals = {"hand": [], "auto": [], "same": []}
+    for code, column in code_column_names(hand.columns).items():
+        hand_codes = hand[column].where(hand[column].isin(CODED_VALUES))
+        auto_codes = suggested[column].where(suggested[column].isin(CODED_VALUES))
+        h = hand_codes.notna().to_numpy()
+        a = auto_codes.notna().to_numpy()
+        same = (hand_codes == auto_codes).to_numpy()
+        totals["hand"].append(h)
+        totals["auto"].append(a)
+        totals["same"].append(same)
+        rows.append(_agreement_row(code, h, a, same))
+    rows.append(_agreement_row("All codes", *(np.concatenate(totals[key]) for key in ("hand", "auto", "same"))))
+    return pd.DataFrame(rows).set_index("Code")
+
+
+def _agreement_row(code, hand, auto, same):
+    both = hand & auto
+    n = len(hand)
+    observed = (hand == auto).mean() if n else np.nan
+    expected = (hand.mean() * auto.mean() + (1 - hand.mean()) * (1 - auto.mean())) if n else np.nan
+    return {
+        "Code": code,
+        "Hand": int(hand.sum()),
+        "Suggested": int(auto.sum()),
+        "Precision": both.sum() / auto.sum() if auto.any() else np.nan,
+        "Recall": both.sum() / hand.sum() if hand.any() else np.nan,
+        "Kappa": (observed - expected) / (1 - expected) if expected < 1 else np.nan,
+        "C/O Agreement": same[both].mean() if both.any() else np.nan,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Suggest narrative codes for article snippets from the codebook lexicon.")
+    parser.add_argument("csv_files", nargs='+', help="*_raw_text_data.csv files")
+    parser.add_argument("-o", "--output", help="Where to write the suggestions (only for a single input file)")
+    parser.add_argument("--report", action="store_true", help="Print the agreement with the hand codes in the files")
+    parser.add_argument("--workers", type=int, help="Processes to use (default: all CPUs)")
+    args = parser.parse_args()
+    if args.output and len(args.csv_files) > 1:
+        parser.error("-o/--output takes a single input file")
+
+    for csv_file in args.csv_files:
+        snippets = pd.read_csv(csv_file, dtype=str)
+        suggested = suggest_codes(snippets, args.workers)
+        if args.output:
+            suggested.to_csv(args.output, index=False)
+            print(f"Wrote suggested codes for {len(suggested)} snippets to {args.output}")
+        if args.report:
+            report = agreement_report(snippets, suggested)
+            print(f"\n{csv_file}\n{report.to_string(float_format='{:.2f}'.format)}")
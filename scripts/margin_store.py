@@ -0,0 +1,231 @@
+# ===================================================================
+# Score Margin Store
+# ===================================================================
+# The halftime rule only sees the score at the break, so a team that
+# was down 20 in the third quarter and won is never flagged. This
+# module turns each game's play-by-play into a compact margin array
+# (home minus away after every scoring play, int16, with the game
+# clock in seconds as uint16) and stores a whole league/season as
+# flat .npy files plus an offsets array, under
+# data/store/margins/league=NBA/season=2024/. The files are opened
+# memory-mapped, so several seasons of both leagues cost a few MB of
+# RAM. comeback_stats() then works out, for every game at once with
+# segmented cumulative minimums, the largest deficit the winner
+# overcame, when it peaked and how long the winner took to tie it.
+#
+# Usage: python margin_store.py build data/raw/nba_raw_data_2024_bball_ref.csv
+#        python margin_store.py build --pages <saved_pages_folder>
+#        python margin_store.py comebacks --threshold 20
+# ===================================================================
+
+import argparse
+import asyncio
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from pbp_metrics import QUARTER_SECONDS, game_elapsed, league_of, parse_pbp, pbp_url, saved_pbp_pages
+
+# --- Configuration, change as needed ---
+MARGIN_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "store", "margins")
+
+BOX_SCORE_DATE_PATTERN = re.compile(r"boxscores/(?:pbp/)?(?P<year>\d{4})(?P<month>\d{2})\d{2}\d[A-Z]{3}\.html$")
+GAME_COLUMNS = ["Game_URL", "Away_Team", "Home_Team", "Final_Margin"]
+
+
+def season_of(league, url):
+    """Season year of a box-score or play-by-play URL: NBA games from October on count toward the next year."""
+    match = BOX_SCORE_DATE_PATTERN.search(url)
+    year, month = int(match['year']), int(match['month'])
+    return year + 1 if league == "NBA" and month >= 10 else year
+
+
+def game_margins(html, league):
+    """
+    Reads one play-by-play page into its margin array.
+
+    Returns:
+        tuple: (margins, elapsed, teams) where margins holds home minus away, starting with 0 at
+               tip-off and adding one entry per scoring play, elapsed the game-clock second of each
+               entry, and teams the [away, home] team codes.
+    """
+    quarter_seconds = QUARTER_SECONDS[league]
+    margins = [0]
+    elapsed = [0]
+
+    def on_event(event):
+        margin = event["home_score"] - event["away_score"]
+        if margin != margins[-1]:
+            margins.append(margin)
+            elapsed.append(int(game_elapsed(quarter_seconds, event["quarter"], event["clock"])))
+
+    target = parse_pbp(html, on_event)
+    return np.array(margins, np.int16), np.array(elapsed, np.uint16), target.teams
+
+
+def partition_dir(league, season, store_dir=MARGIN_STORE_DIR):
+    return os.path.join(store_dir, f"league={league}", f"season={season}")
+
+
+def write_partition(games, league, season, store_dir=MARGIN_STORE_DIR):
+    """
+    Writes one league/season of margin arrays, replacing whatever was there before.
+
+    Args:
+        games (list): (Game_URL, margins, elapsed, teams) tuples as built from game_margins().
+    """
+    path = partition_dir(league, season, store_dir)
+    os.makedirs(path, exist_ok=True)
+    lengths = [len(margins) for _, margins, _, _ in games]
+    offsets = np.zeros(len(games) + 1, np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    np.save(os.path.join(path, "margins.npy"), np.concatenate([g[1] for g in games]).astype(np.int16))
+    np.save(os.path.join(path, "elapsed.npy"), np.concatenate([g[2] for g in games]).astype(np.uint16))
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    index = pd.DataFrame([(url, *(teams if len(teams) == 2 else [None, None]), int(margins[-1]))
+                          for url, margins, _, teams in games], columns=GAME_COLUMNS)
+    index.to_csv(os.path.join(path, "games.csv"), index=False)
+
+
+def open_partition(path):
+    """Opens a partition's arrays memory-mapped. Returns (games, margins, elapsed, offsets)."""
+    load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+    return pd.read_csv(os.path.join(path, "games.csv")), load("margins"), load("elapsed"), load("offsets")
+
+
+def max_deficit_stats(margins, elapsed, offsets):
+    """
+    Works out the largest deficit each game's winner overcame, for every game in one set of flat arrays.
+
+    Args:
+        margins (np.ndarray): Home-minus-away margins of all games back to back.
+        elapsed (np.ndarray): Game-clock second of every margin entry.
+        offsets (np.ndarray): Start of each game in the flat arrays, plus the total length at the end.
+
+    Returns:
+        dict: Per-game arrays Winner ('home'/'away'), Max_Deficit_Overcome (0 if the winner never
+              trailed), Deficit_Peak_Seconds and Time_To_Tie_Seconds (seconds from the peak deficit
+              until the winner had tied it, NaN if the winner never trailed).
+    """
+    lengths = np.diff(offsets)
+    n_games = len(lengths)
+    game = np.repeat(np.arange(n_games), lengths)
+    position = np.arange(len(margins))
+    final = np.asarray(margins[offsets[1:] - 1], np.int64)
+
+    # Margins seen from the eventual winner: negative means the winner was behind.
+    winner_margin = np.asarray(margins, np.int64) * np.where(final > 0, 1, -1)[game]
+
+    # Segmented cumulative minimum: shifting every game further down than the whole margin range
+    # lets one np.minimum.accumulate run over all games without one game leaking into the next.
+    shift = game * (1 << 16)
+    running_min = np.minimum.accumulate(winner_margin - shift) + shift
+    lowest = running_min[offsets[1:] - 1]
+
+    # The peak is the first time the winner hit its lowest margin, the tie the first time after it at >= 0.
+    peak = np.unique(game[winner_margin == lowest[game]], return_index=True)[1]
+    peak_position = np.flatnonzero(winner_margin == lowest[game])[peak]
+    tied = np.flatnonzero((position > peak_position[game]) & (winner_margin >= 0))
+    tie_games, first_tie = np.unique(game[tied], return_index=True)
+    time_to_tie = np.full(n_games, np.nan)
+    time_to_tie[tie_games] = elapsed[tied[first_tie]].astype(np.int64) - elapsed[peak_position[tie_games]]
+
+    trailed = lowest < 0
+    return {
+        "Winner": np.where(final > 0, "home", "away"),
+        "Max_Deficit_Overcome": np.where(trailed, -lowest, 0),
+        "Deficit_Peak_Seconds": np.where(trailed, elapsed[peak_position], np.nan),
+        "Time_To_Tie_Seconds": np.where(trailed, time_to_tie, np.nan),
+    }
+
+
+def comeback_stats(leagues=None, seasons=None, store_dir=MARGIN_STORE_DIR):
+    """
+    Max-deficit statistics of every stored game, one row per Game_URL, computed partition by
+    partition straight off the memory-mapped arrays.
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(store_dir, "league=*", "season=*"))):
+        league = os.path.basename(os.path.dirname(path)).split('=')[1]
+        season = int(os.path.basename(path).split('=')[1])
+        if (leagues and league not in leagues) or (seasons and season not in seasons):
+            continue
+        games, margins, elapsed, offsets = open_partition(path)
+        stats = pd.DataFrame(max_deficit_stats(margins, elapsed, offsets))
+        stats.insert(0, "Game_URL", games["Game_URL"])
+        stats.insert(1, "League", league)
+        stats.insert(2, "Season", season)
+        stats["Comeback_Team"] = np.where(stats["Winner"] == "home", games["Home_Team"], games["Away_Team"])
+        frames.append(stats)
+    if not frames:
+        return pd.DataFrame(columns=["Game_URL", "League", "Season", "Winner", "Max_Deficit_Overcome",
+                                     "Deficit_Peak_Seconds", "Time_To_Tie_Seconds", "Comeback_Team"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_from_pages(pages, store_dir=MARGIN_STORE_DIR):
+    """
+    Builds partitions from (url, html) pairs, grouping them by league and season. Box-score Game_URLs
+    are stored so the stats join with the raw data files. Returns {(league, season): games}.
+    """
+    partitions = {}
+    for url, html in pages:
+        league = league_of(url)
+        margins, elapsed, teams = game_margins(html, league)
+        box_score_url = url.replace("/boxscores/pbp/", "/boxscores/", 1)
+        partitions.setdefault((league, season_of(league, url)), []).append((box_score_url, margins, elapsed, teams))
+    for (league, season), games in partitions.items():
+        write_partition(games, league, season, store_dir)
+    return {key: len(games) for key, games in partitions.items()}
+
+
+def fetch_pbp_pages(game_urls, **fetch_options):
+    """Fetches the play-by-play page of every box-score URL through the fetch engine. Returns (url, html) pairs."""
+    from fetch_engine import fetch_pages
+
+    pages = []
+
+    def handle_page(url, html, error):
+        if error is not None:
+            print(f"---! Could not load {url}: {error}")
+        else:
+            pages.append((url, html))
+
+    asyncio.run(fetch_pages([pbp_url(url) for url in game_urls], handle_page, **fetch_options))
+    return pages
+
+
+def _read_saved(pages):
+    for path, url in pages:
+        with open(path, encoding='utf-8') as f:
+            yield url, f.read()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the play-by-play margin store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Store the margin arrays of a season's games")
+    build_parser.add_argument("csv_files", nargs='*', help="*_raw_data_*.csv files whose games' PBP pages to fetch")
+    build_parser.add_argument("--pages", help="Folder of saved pages laid out like the site, instead of fetching")
+    query_parser = subparsers.add_parser("comebacks", help="List games won from at least --threshold points down")
+    query_parser.add_argument("--threshold", type=int, default=20)
+    query_parser.add_argument("--leagues", nargs='+')
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.pages:
+            pages = _read_saved(saved_pbp_pages(args.pages))
+        else:
+            from html_cache import HtmlCache
+
+            game_urls = pd.concat([pd.read_csv(csv_file) for csv_file in args.csv_files])['Game_URL'].tolist()
+            pages = fetch_pbp_pages(game_urls, cache=HtmlCache())
+        for (league, season), count in sorted(build_from_pages(pages).items()):
+            print(f"Stored {count} games in league={league}/season={season}")
+    else:
+        stats = comeback_stats(leagues=args.leagues)
+        comebacks = stats[stats["Max_Deficit_Overcome"] >= args.threshold]
+        print(comebacks.sort_values("Max_Deficit_Overcome", ascending=False).to_string(index=False))
@@ -0,0 +1,55 @@
+# ===================================================================
+# Game Normalization
+# ===================================================================
+# Game_Date comes out of the scrapers in several shapes ("7:30 PM,
+# October 18, 2022", "06/04/2023", a bare "2023", or empty), but
+# every box-score URL ends in boxscores/YYYYMMDD<seq><HOME>.html.
+# This stage reads the date, game sequence digit and home-team code
+# out of Game_URL for the whole table at once and stores them as
+# typed columns, so later steps can filter and sort on dates without
+# parsing any strings. The checkpoint store runs it once when it
+# exports the *_raw_data_*.csv file, so tables read back from that
+# file only need their dtypes restored.
+# ===================================================================
+
+import pandas as pd
+
+# One pattern, applied to the whole column in a single vectorized pass.
+BOX_SCORE_URL_PATTERN = r"boxscores/(?P<date>\d{8})(?P<seq>\d)(?P<home>[A-Z]{3})\.html$"
+
+# Columns normalize_games() adds next to the typed Game_Date.
+NORMALIZED_COLUMNS = ["Game_Date_Text", "Home_Code", "Game_Seq"]
+
+
+def normalize_games(df):
+    """
+    Adds the typed columns derived from Game_URL to a games table.
+
+    Game_Date becomes a datetime64 date (the original text is kept as Game_Date_Text),
+    Home_Code the 3-letter home-team code as a categorical, and Game_Seq the sequence digit
+    basketball-reference puts between date and team (0 for a normal game) as a small int.
+    Rows whose URL is not a box-score URL get NaT/NA. A table that already has these columns
+    (a *_raw_data_*.csv exported by the checkpoint store) only gets its dtypes restored.
+
+    Args:
+        df (pd.DataFrame): Games with a Game_URL column and, optionally, the scraped Game_Date text.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the normalized columns.
+    """
+    df = df.copy()
+    if all(column in df for column in NORMALIZED_COLUMNS):
+        df['Game_Date'] = pd.to_datetime(df['Game_Date'], format='%Y-%m-%d', errors='coerce')
+        df['Game_Date_Text'] = df['Game_Date_Text'].astype('string')
+        df['Home_Code'] = df['Home_Code'].astype('string').astype('category')
+        df['Game_Seq'] = df['Game_Seq'].astype('Int8')
+        return df
+
+    parts = df['Game_URL'].astype('string').str.extract(BOX_SCORE_URL_PATTERN)
+
+    if 'Game_Date' in df and 'Game_Date_Text' not in df:
+        df['Game_Date_Text'] = df['Game_Date'].astype('string')
+    df['Game_Date'] = pd.to_datetime(parts['date'], format='%Y%m%d', errors='coerce')
+    df['Home_Code'] = parts['home'].astype('category')
+    df['Game_Seq'] = pd.to_numeric(parts['seq'], errors='coerce').astype('Int8')
+    return df
@@ -0,0 +1,365 @@
+# ===================================================================
+# Play-by-Play Aftermath Metrics
+# ===================================================================
+# Computes the columns of data/processed/pbp_wnba_nba_data.csv from
+# basketball-reference.com play-by-play pages instead of by hand.
+# Each page is streamed once through lxml's parser, every row of the
+# #pbp table becomes an event, and the events are fed straight into
+# AftermathMetrics, which finds the halftime score, the moment the
+# trailing team first ties the game in the second half, and counts
+# both teams' timeouts, points, field goals, turnovers and fouls in
+# the window after that tie. Nothing but the running totals is kept
+# in memory, so whole seasons of pages can be processed, from saved
+# files or fetched through the fetch engine and HTML cache.
+#
+# Usage: python pbp_metrics.py data/processed/pbp_wnba_nba_data.csv -o pbp_metrics.csv
+#        python pbp_metrics.py --pages <saved_pages_folder> -o pbp_metrics.csv
+# ===================================================================
+
+import argparse
+import asyncio
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from lxml import etree
+
+# --- Configuration, change as needed ---
+AFTERMATH_SECONDS = 6 * 60 # Length of the window after the tie, in game-clock seconds (capped at the end of the game)
+QUARTER_SECONDS = {"NBA": 12 * 60, "WNBA": 10 * 60}
+OVERTIME_SECONDS = 5 * 60
+SITE_ROOT = "https://www.basketball-reference.com"
+
+# Same headers as the hand-compiled pbp_wnba_nba_data.csv, so the output can stand in for it.
+PBP_COLUMNS = ["Game ID", "League", "Comeback Team (CBT)", "Opponent Team (OPP)", "Game Date", "PBP Link",
+               "Halftime Scores (CBT-OPP)", "Score Tied At", "Tie Quarter", "Tie Time (Min:Sec:Mili)",
+               "Aftermath End Quarter", "Aftermath End Time (Qtr:Min:Sec)", "C- Full Timeouts", "O- Full Timeouts",
+               "C -Points Scored", " C- Points Allowed", "C- FG Made", "C- FG Attempts ", "O- FG Made",
+               "O- FG Attempts", "C- Turnovers ", "O- Turnovers ", "C- Fouls Committed", "O- Fouls Committed ",
+               "CBT Won"]
+
+PBP_URL_PATTERN = re.compile(r"boxscores/pbp/(?P<date>\d{8})\d[A-Z]{3}\.html$")
+FIELD_GOAL_PATTERN = re.compile(r"\b(makes|misses) [23]-pt\b")
+
+
+def pbp_url(box_score_url):
+    """The play-by-play page of a box score, e.g. .../boxscores/202312290ATL.html -> .../boxscores/pbp/202312290ATL.html."""
+    return box_score_url.replace("/boxscores/", "/boxscores/pbp/", 1)
+
+
+def league_of(url):
+    return "WNBA" if "/wnba/" in url else "NBA"
+
+
+def clock_seconds(clock):
+    """'4:32.0' -> 272.0 seconds left in the period."""
+    minutes, _, seconds = clock.partition(':')
+    return int(minutes) * 60 + float(seconds)
+
+
+def format_clock(seconds):
+    """272.0 -> '4:32.0', the way the play-by-play table shows the clock."""
+    minutes, seconds = divmod(round(seconds, 1), 60)
+    return f"{int(minutes)}:{seconds:04.1f}"
+
+
+def game_elapsed(quarter_seconds, quarter, clock):
+    """Game-clock seconds since tip-off at a given quarter (5+ for overtime) and clock."""
+    if quarter <= 4:
+        return quarter * quarter_seconds - clock_seconds(clock)
+    return 4 * quarter_seconds + (quarter - 4) * OVERTIME_SECONDS - clock_seconds(clock)
+
+
+class _PbpTarget:
+    """
+    lxml parser target that turns every row of the #pbp table into an event dict and hands it to
+    on_event as soon as the row closes. Also picks up the two team codes from the scorebox and the
+    team names from the table header, which is how timeout rows name the team.
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self.teams = [] # [away, home] team codes
+        self.names = [] # [away, home] names as the table header shows them
+        self.events = 0
+        self._quarter = 0
+        self._score = (0, 0)
+        self._in_table = False
+        self._scorebox_depth = 0
+        self._cells = self._text = None
+
+    def start(self, tag, attrib):
+        if self._in_table:
+            if tag == 'tr':
+                self._cells = []
+            elif tag in ('th', 'td') and self._cells is not None:
+                self._text = []
+        elif tag == 'table' and attrib.get('id') == 'pbp':
+            self._in_table = True
+        elif tag == 'div':
+            if self._scorebox_depth:
+                self._scorebox_depth += 1
+            elif 'scorebox' in attrib.get('class', '').split():
+                self._scorebox_depth = 1
+        elif tag == 'a' and self._scorebox_depth and len(self.teams) < 2:
+            match = re.search(r"/teams/([A-Z]{3})/", attrib.get('href', ''))
+            if match and match.group(1) not in self.teams:
+                self.teams.append(match.group(1))
+
+    def data(self, text):
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag):
+        if self._in_table:
+            if tag in ('th', 'td') and self._text is not None:
+                self._cells.append(''.join(self._text).replace('\xa0', ' ').strip())
+                self._text = None
+            elif tag == 'tr' and self._cells is not None:
+                self._row(self._cells)
+                self._cells = None
+            elif tag == 'table':
+                self._in_table = False
+        elif tag == 'div' and self._scorebox_depth:
+            self._scorebox_depth -= 1
+
+    def _row(self, cells):
+        if len(cells) == 6 and cells[0] == "Time":
+            self.names = [cells[1], cells[5]]
+            return
+        if len(cells) < 2 or ':' not in cells[0]:
+            return # Quarter headings and repeated header rows
+        text = cells[1]
+        side = None
+        if len(cells) == 6:
+            side = 'away' if cells[1] else 'home'
+            text = cells[1] or cells[5]
+            away, _, home = cells[3].partition('-')
+            self._score = (int(away), int(home))
+        elif text.startswith("Start of"):
+            self._quarter += 1
+        else:
+            # Rows spanning the table (timeouts, jump balls, ...) start with the team's header name, if any.
+            for row_side, name in zip(('away', 'home'), self.names):
+                if name and text.startswith(name):
+                    side = row_side
+        self.events += 1
+        self.on_event({"quarter": self._quarter, "clock": cells[0], "side": side, "text": text,
+                       "away_score": self._score[0], "home_score": self._score[1]})
+
+    def comment(self, text):
+        # Some page versions ship the table inside a comment until JS runs.
+        if 'id="pbp"' in text:
+            etree.fromstring(text, etree.HTMLParser(target=self))
+
+    def close(self):
+        return self
+
+
+def parse_pbp(html, on_event):
+    """
+    Streams the play-by-play table of a page, calling on_event(event) for every row in order.
+
+    Each event is a dict with quarter (1-4, 5+ for overtime), clock (as shown, e.g. '4:32.0'),
+    side ('away'/'home' for the team the play belongs to, None for rows such as period starts),
+    text and the away_score/home_score after the play.
+
+    Returns:
+        _PbpTarget: Holds the team codes (teams), header names (names) and the number of events.
+    """
+    return etree.fromstring(html, etree.HTMLParser(target=_PbpTarget(on_event)))
+
+
+class AftermathMetrics:
+    """
+    Running per-team totals for one game, fed one event at a time. The comeback team (CBT) is
+    the team trailing at halftime (the away team on a tied halftime, as in comeback_analysis.py).
+    The aftermath window opens right after the first play in the second half that ties the score
+    and closes AFTERMATH_SECONDS of game clock later, or at the end of the last period played
+    (overtime included).
+    """
+
+    def __init__(self, league, window_seconds=AFTERMATH_SECONDS):
+        self.quarter_seconds = QUARTER_SECONDS[league]
+        self.window_seconds = window_seconds
+        self.score = (0, 0)
+        self.halftime = None
+        self.cbt = None
+        self.tie = None
+        self.window_end = None
+        self.last_quarter = 4
+        self.totals = {side: {"timeouts": 0, "points": 0, "fg_made": 0, "fg_attempts": 0, "turnovers": 0, "fouls": 0}
+                       for side in ('away', 'home')}
+
+    def elapsed(self, quarter, clock):
+        return game_elapsed(self.quarter_seconds, quarter, clock)
+
+    def period_end(self, quarter):
+        return self.elapsed(quarter, "0:00")
+
+    def position(self, elapsed):
+        """The (quarter, clock text) of a point in the game given as seconds since tip-off."""
+        quarter = 1
+        while quarter < self.last_quarter and elapsed >= self.period_end(quarter):
+            quarter += 1
+        return quarter, format_clock(self.period_end(quarter) - elapsed)
+
+    def add(self, event):
+        previous, self.score = self.score, (event["away_score"], event["home_score"])
+        self.last_quarter = max(self.last_quarter, event["quarter"])
+        if self.halftime is None:
+            if event["quarter"] < 3:
+                return
+            self.halftime = previous
+            self.cbt = 'away' if previous[0] <= previous[1] else 'home'
+
+        if self.tie is None:
+            if self.score[0] == self.score[1] and previous[0] != previous[1]:
+                elapsed = self.elapsed(event["quarter"], event["clock"])
+                self.tie = {"score": self.score[0], "quarter": event["quarter"], "clock": event["clock"]}
+                # Where the game ends is only known at the end, row() caps the window there.
+                self.window_end = elapsed + self.window_seconds
+            return
+        if self.elapsed(event["quarter"], event["clock"]) > self.window_end:
+            return
+
+        text = event["text"]
+        if event["side"] is None:
+            return
+        totals = self.totals[event["side"]]
+        if "full timeout" in text:
+            totals["timeouts"] += 1
+        totals["points"] += (self.score[0] - previous[0]) + (self.score[1] - previous[1])
+        shot = FIELD_GOAL_PATTERN.search(text)
+        if shot:
+            totals["fg_attempts"] += 1
+            totals["fg_made"] += shot.group(1) == "makes"
+        if text.startswith("Turnover by"):
+            totals["turnovers"] += 1
+        if "foul by" in text:
+            totals["fouls"] += 1
+
+    def row(self, league, url, teams, game_id=None):
+        """The finished game as a PBP_COLUMNS row. Tie and window columns stay empty if the CBT never tied it."""
+        cbt, opp = (0, 1) if self.cbt == 'away' else (1, 0)
+        c, o = self.totals[('away', 'home')[cbt]], self.totals[('away', 'home')[opp]]
+        halftime = self.halftime or (0, 0)
+        match = PBP_URL_PATTERN.search(url)
+        row = {
+            "Game ID": game_id, "League": league,
+            "Comeback Team (CBT)": teams[cbt] if len(teams) == 2 else None,
+            "Opponent Team (OPP)": teams[opp] if len(teams) == 2 else None,
+            "Game Date": f"{match['date'][4:6]}/{match['date'][6:]}/{match['date'][:4]}" if match else None,
+            "PBP Link": url,
+            "Halftime Scores (CBT-OPP)": f"{halftime[cbt]}-{halftime[opp]}",
+            "Score Tied At": None, "Tie Quarter": None, "Tie Time (Min:Sec:Mili)": None,
+            "Aftermath End Quarter": None, "Aftermath End Time (Qtr:Min:Sec)": None,
+            "C- Full Timeouts": c["timeouts"], "O- Full Timeouts": o["timeouts"],
+            "C -Points Scored": c["points"], " C- Points Allowed": o["points"],
+            "C- FG Made": c["fg_made"], "C- FG Attempts ": c["fg_attempts"],
+            "O- FG Made": o["fg_made"], "O- FG Attempts": o["fg_attempts"],
+            "C- Turnovers ": c["turnovers"], "O- Turnovers ": o["turnovers"],
+            "C- Fouls Committed": c["fouls"], "O- Fouls Committed ": o["fouls"],
+            "CBT Won": self.score[cbt] > self.score[opp],
+        }
+        if self.tie:
+            end_quarter, end_clock = self.position(min(self.window_end, self.period_end(self.last_quarter)))
+            row.update({"Score Tied At": self.tie["score"], "Tie Quarter": self.tie["quarter"],
+                        "Tie Time (Min:Sec:Mili)": self.tie["clock"], "Aftermath End Quarter": end_quarter,
+                        "Aftermath End Time (Qtr:Min:Sec)": end_clock})
+        return row
+
+
+def pbp_game_metrics(html, url, league=None, game_id=None, window_seconds=AFTERMATH_SECONDS):
+    """
+    Computes the aftermath metrics of one play-by-play page in a single pass.
+
+    Args:
+        html (str): The play-by-play page HTML.
+        url (str): The page URL, stored as PBP Link and used for the game date.
+        league (str): "NBA" or "WNBA". Worked out from the URL if not given.
+        game_id (str): Optional Game ID to carry over, e.g. "nba_01".
+        window_seconds (int): Length of the aftermath window.
+
+    Returns:
+        tuple: (row, events) where row is a dict with the PBP_COLUMNS and events the number of plays read.
+    """
+    league = league or league_of(url)
+    metrics = AftermathMetrics(league, window_seconds)
+    target = parse_pbp(html, metrics.add)
+    return metrics.row(league, url, target.teams, game_id), target.events
+
+
+def _metrics_from_file(path_and_url):
+    path, url = path_and_url
+    with open(path, encoding='utf-8') as f:
+        return pbp_game_metrics(f.read(), url)
+
+
+def saved_pbp_pages(root):
+    """Lists (path, url) for every saved play-by-play page under a stub-site folder."""
+    pages = []
+    for prefix in ("boxscores/pbp", "wnba/boxscores/pbp"):
+        for path in sorted(glob.glob(os.path.join(root, prefix, "*.html"))):
+            pages.append((path, f"{SITE_ROOT}/{prefix}/{os.path.basename(path)}"))
+    return pages
+
+
+def metrics_from_saved_pages(root, workers=None):
+    """
+    Computes the metrics for every saved play-by-play page under `root`, spread over `workers`
+    processes (all CPUs by default). Returns (DataFrame, total events read).
+    """
+    pages = saved_pbp_pages(root)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_metrics_from_file, pages, chunksize=16))
+    rows = [row for row, _ in results]
+    return pd.DataFrame(rows, columns=PBP_COLUMNS), sum(events for _, events in results)
+
+
+def metrics_from_urls(urls, game_ids=None, **fetch_options):
+    """
+    Fetches play-by-play pages through the fetch engine (and its HTML cache, if one is passed in
+    fetch_options) and computes their metrics. Pages that fail are reported and left out.
+    """
+    from fetch_engine import fetch_pages
+
+    game_ids = game_ids or {}
+    rows = []
+
+    def handle_page(url, html, error):
+        if error is not None:
+            print(f"---! Could not load {url}: {error}")
+            return
+        rows.append(pbp_game_metrics(html, url, game_id=game_ids.get(url))[0])
+
+    asyncio.run(fetch_pages(urls, handle_page, **fetch_options))
+    order = {url: i for i, url in enumerate(urls)}
+    rows.sort(key=lambda row: order[row["PBP Link"]])
+    return pd.DataFrame(rows, columns=PBP_COLUMNS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute the aftermath metrics from play-by-play pages.")
+    parser.add_argument("games_csv", nargs='?', help="CSV with a 'PBP Link' column (and optionally 'Game ID')")
+    parser.add_argument("--pages", help="Folder of saved pages laid out like the site, instead of fetching")
+    parser.add_argument("--workers", type=int, help="Processes used for saved pages (default: all CPUs)")
+    parser.add_argument("-o", "--output", default="pbp_metrics.csv")
+    args = parser.parse_args()
+
+    if args.pages:
+        df, events = metrics_from_saved_pages(args.pages, args.workers)
+        print(f"Read {events} play-by-play events from {len(df)} saved pages.")
+    elif args.games_csv:
+        from html_cache import HtmlCache
+
+        games = pd.read_csv(args.games_csv)
+        urls = games['PBP Link'].dropna().tolist()
+        game_ids = dict(zip(games['PBP Link'], games['Game ID'])) if 'Game ID' in games else None
+        df = metrics_from_urls(urls, game_ids, cache=HtmlCache())
+    else:
+        parser.error("pass a games CSV or --pages")
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df)} games to {args.output}")
@@ -0,0 +1,167 @@
+# ===================================================================
+# Adaptive Rate Limiter
+# ===================================================================
+# A fixed request budget is too slow while the site answers happily
+# and too fast once it starts throttling. AdaptiveRateLimiter raises
+# each host's rate by a small factor after every successful response
+# and halves it (plus an exponential pause, or the server's Retry-After)
+# on a 429, 503 or timeout. A circuit breaker stops all requests to a
+# host after several failures in a row, waits out a cooldown and then
+# lets requests trickle through again at the minimum rate. If the
+# host keeps failing after a few cooldowns it gives up with
+# CircuitOpen so the remaining games go to the retry queue instead of
+# hammering a site that is blocking us. AdaptiveDelay does the same
+# job for the Selenium workers, which pace themselves with sleeps.
+# ===================================================================
+
+import asyncio
+import random
+import time
+
+# --- Configuration, change as needed ---
+START_PER_MINUTE = 12 # Rate every host starts at
+MIN_PER_MINUTE = 2 # Floor the rate never drops below
+MAX_PER_MINUTE = 20 # Ceiling, basketball-reference.com blocks clients that go over 20/min
+INCREASE_FACTOR = 1.02 # Rate is multiplied by this after each successful response
+DECREASE_FACTOR = 0.5 # Rate is multiplied by this on a throttled or timed out request
+DECREASE_HOLDOFF = 1.0 # Seconds after a decrease during which further throttles (requests already in flight) don't cut again
+BACKOFF_BASE = 2 # Seconds paused after the first failure in a row, doubled for each further one
+BACKOFF_MAX = 300 # Longest pause in seconds
+BREAKER_THRESHOLD = 5 # Failures in a row that open the circuit
+BREAKER_COOLDOWN = 120 # Seconds the circuit stays open
+BREAKER_MAX_TRIPS = 3 # Openings in a row (without a success in between) before giving up on the host
+
+
+class CircuitOpen(Exception):
+    """Raised when a host kept failing through several cooldowns and requests to it are abandoned."""
+
+
+def backoff_delay(failures, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with jitter: about base, 2*base, 4*base, ... seconds, capped at `cap`."""
+    if failures <= 0:
+        return 0.0
+    delay = min(cap, base * 2 ** (failures - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` failures in a row and stays open for `cooldown` seconds. Once the
+    cooldown is over the next request is let through as a probe: a success closes the circuit,
+    another failure opens it again straight away. After `max_trips` openings in a row it stays open.
+    Failures reported while the circuit is open count towards nothing, so each opening is one trip.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_trips=BREAKER_MAX_TRIPS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    def record_success(self):
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self):
+        now = time.monotonic()
+        if now < self.open_until:
+            return # A request that was already in flight when the circuit opened
+        self.failures += 1
+        # Once tripped (and not closed by a success since), a failed probe reopens the circuit at once.
+        if self.failures >= self.threshold or self.trips:
+            self.trips += 1
+            self.failures = 0
+            self.open_until = now + self.cooldown
+
+    def wait_time(self):
+        """Seconds until requests may go out again. Raises CircuitOpen once the breaker has given up."""
+        if self.trips >= self.max_trips:
+            raise CircuitOpen(f"circuit opened {self.trips} times in a row")
+        return max(0.0, self.open_until - time.monotonic())
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host request budget that adapts to how the host answers. A drop-in replacement for
+    fetch_engine.HostRateBudget: the Fetcher calls acquire() before every request and
+    record_success()/record_throttle() after it.
+    """
+
+    def __init__(self, per_minute=START_PER_MINUTE, min_per_minute=MIN_PER_MINUTE, max_per_minute=MAX_PER_MINUTE,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.start_per_minute = min(per_minute, max_per_minute)
+        self.min_per_minute = min_per_minute
+        self.max_per_minute = max_per_minute
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.rates = {}
+        self.breakers = {}
+        self.successes = 0
+        self.throttled = 0
+        self._next_slot = {}
+        self._last_decrease = {}
+        self._lock = asyncio.Lock()
+
+    def rate(self, host):
+        """Current requests per minute allowed for `host`."""
+        return self.rates.get(host, self.start_per_minute)
+
+    def _breaker(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self.breakers[host]
+
+    async def acquire(self, host):
+        """Waits for the circuit to close and the next request slot for `host` to open up."""
+        while True:
+            wait = self._breaker(host).wait_time()
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 60.0 / self.rate(host)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def record_success(self, host):
+        """Every answered request earns the host a slightly higher rate, up to max_per_minute."""
+        self.successes += 1
+        self.rates[host] = min(self.max_per_minute, self.rate(host) * INCREASE_FACTOR)
+        self._breaker(host).record_success()
+
+    def record_throttle(self, host, retry_after=None):
+        """Cuts the rate by DECREASE_FACTOR and pauses the host, for Retry-After seconds if the server sent one."""
+        self.throttled += 1
+        breaker = self._breaker(host)
+        breaker.record_failure()
+        now = time.monotonic()
+        if now - self._last_decrease.get(host, float('-inf')) >= DECREASE_HOLDOFF:
+            self.rates[host] = max(self.min_per_minute, self.rate(host) * DECREASE_FACTOR)
+            self._last_decrease[host] = now
+        pause = retry_after if retry_after is not None else backoff_delay(breaker.failures)
+        self._next_slot[host] = max(self._next_slot.get(host, 0.0), now + pause)
+
+
+class AdaptiveDelay:
+    """
+    Sleep-based pacing for one Selenium worker. The delay starts at `maximum`, shrinks a little
+    after every page that loads and doubles (up to BACKOFF_MAX) after one that times out.
+    """
+
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.delay = maximum
+
+    def wait(self):
+        time.sleep(random.uniform(self.delay * 0.8, self.delay * 1.2))
+
+    def record_success(self):
+        self.delay = max(self.minimum, self.delay * 0.9)
+
+    def record_failure(self):
+        self.delay = min(BACKOFF_MAX, max(self.maximum, self.delay * 2))
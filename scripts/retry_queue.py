@@ -0,0 +1,146 @@
+# ===================================================================
+# Retry Queue
+# ===================================================================
+# Durable record of every game that failed to scrape, so no game is
+# silently dropped. Each failure is sorted into a class (timeout,
+# throttled, missing line score, parse error, ...) and stored with
+# its attempt count and the earliest time it should be tried again,
+# in the same SQLite file as the season's checkpoint store. A game
+# leaves the queue as soon as it is scraped. The scrapers and the
+# batch runner retry whatever is due at the start of every run and
+# print what is still queued at the end.
+#
+# Usage: python retry_queue.py nba_raw_data_2025_bball_ref.sqlite [--reset]
+# ===================================================================
+
+import argparse
+import asyncio
+import sqlite3
+import time
+
+from box_score import MissingLineScore
+from rate_limiter import CircuitOpen, backoff_delay
+
+# --- Configuration, change as needed ---
+MAX_ATTEMPTS = 5 # Failed attempts after which a game is no longer retried automatically
+RETRY_BACKOFF_BASE = 600 # Seconds before the first retry, doubled for each further failure
+RETRY_BACKOFF_MAX = 24 * 3600
+
+# Failures worth retrying later over HTTP; the others may need the browser to render the page.
+TRANSIENT_FAILURES = {"timeout", "throttled", "circuit_open", "network"}
+
+
+def classify_failure(error):
+    """Sorts a scraping exception into one of the failure classes stored in the queue."""
+    name = type(error).__name__
+    if isinstance(error, MissingLineScore):
+        return "missing_line_score"
+    if isinstance(error, CircuitOpen):
+        return "circuit_open"
+    if name == "Throttled":
+        return "throttled"
+    if isinstance(error, asyncio.TimeoutError) or name == "TimeoutException":
+        return "timeout"
+    if name == "ClientResponseError":
+        return "http_error"
+    if isinstance(error, KeyError):
+        return "not_cached"
+    if isinstance(error, OSError) or name.startswith(("ClientConnect", "ServerDisconnected")):
+        return "network"
+    if any(cls.__name__ == "WebDriverException" for cls in type(error).__mro__):
+        return "browser_crash"
+    return "parse_error"
+
+
+class RetryQueue:
+    """Failed games keyed by URL, with their failure class, attempt count and next retry time."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS failed_games (
+                game_url TEXT PRIMARY KEY,
+                failure_class TEXT NOT NULL,
+                error TEXT,
+                attempts INTEGER NOT NULL,
+                first_failed REAL NOT NULL,
+                last_failed REAL NOT NULL,
+                next_attempt REAL NOT NULL
+            )
+        """)
+
+    def record(self, url, failure_class, error=None):
+        """Adds a failed game, or bumps its attempt count and pushes its next retry further out."""
+        now = time.time()
+        row = self.db.execute("SELECT attempts FROM failed_games WHERE game_url = ?", (url,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        next_attempt = now + backoff_delay(attempts, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+        with self.db:
+            self.db.execute("""
+                INSERT INTO failed_games VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (game_url) DO UPDATE SET failure_class = excluded.failure_class,
+                    error = excluded.error, attempts = excluded.attempts, last_failed = excluded.last_failed,
+                    next_attempt = excluded.next_attempt
+            """, (url, failure_class, str(error)[:500] if error is not None else None, attempts, now, now,
+                  next_attempt))
+
+    def resolve(self, url):
+        """Drops a game from the queue once it has been scraped."""
+        with self.db:
+            self.db.execute("DELETE FROM failed_games WHERE game_url = ?", (url,))
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM failed_games").fetchone()[0]
+
+    def held_back(self, now=None):
+        """
+        URLs not to retry in this run: those still waiting out their backoff and those that
+        used up MAX_ATTEMPTS (the latter stay queued until reset()).
+        """
+        rows = self.db.execute("SELECT game_url FROM failed_games WHERE next_attempt > ? OR attempts >= ?",
+                               (now or time.time(), MAX_ATTEMPTS))
+        return {row[0] for row in rows}
+
+    def summary(self):
+        """Number of queued games per failure class."""
+        rows = self.db.execute("SELECT failure_class, COUNT(*) FROM failed_games GROUP BY failure_class "
+                               "ORDER BY COUNT(*) DESC")
+        return dict(rows.fetchall())
+
+    def entries(self):
+        """Every queued game as (game_url, failure_class, attempts, error), most attempts first."""
+        return self.db.execute("SELECT game_url, failure_class, attempts, error FROM failed_games "
+                               "ORDER BY attempts DESC, game_url").fetchall()
+
+    def reset(self):
+        """Makes every queued game due again with a fresh attempt count."""
+        with self.db:
+            self.db.execute("UPDATE failed_games SET attempts = 0, next_attempt = 0")
+
+    def report(self):
+        """One line describing what is left in the queue, for the end of a run."""
+        counts = self.summary()
+        if not counts:
+            return "Retry queue is empty."
+        classes = ", ".join(f"{failure_class} {count}" for failure_class, count in counts.items())
+        return f"{sum(counts.values())} games are in the retry queue ({classes}), they are retried on later runs."
+
+    def close(self):
+        self.db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show (or reset) the failed games queued in a checkpoint store.")
+    parser.add_argument("store", help="A *_raw_data_*.sqlite checkpoint file")
+    parser.add_argument("--reset", action="store_true", help="Make every queued game due again")
+    args = parser.parse_args()
+
+    retry_queue = RetryQueue(args.store)
+    if args.reset:
+        retry_queue.reset()
+        print(f"Reset {len(retry_queue)} queued games.")
+    for url, failure_class, attempts, error in retry_queue.entries():
+        print(f"{failure_class:<20} {attempts:>2}x  {url}  {error or ''}")
+    print(retry_queue.report())
+    retry_queue.close()
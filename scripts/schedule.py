@@ -0,0 +1,120 @@
+# ===================================================================
+# Season Schedule Discovery
+# ===================================================================
+# Finds every box-score URL of a season from basketball-reference's
+# schedule pages. NBA seasons are split into one page per month
+# (NBA_2024_games-october.html, ...), WNBA seasons sit on a single
+# {season}_games.html page. Shared by the scrapers and the batch
+# runner. With a ScheduleIndex, only the pages that are not final
+# yet are fetched again, all at once.
+# ===================================================================
+
+import asyncio
+
+from bs4 import BeautifulSoup
+
+from schedule_index import SCHEDULE_INDEX_FILE, ScheduleIndex
+
+SITE_ROOT = "https://www.basketball-reference.com"
+
+
+def schedule_start_url(league, season):
+    """The first schedule page of a season: October for the NBA, the single season page for the WNBA."""
+    if league == "NBA":
+        return f"{SITE_ROOT}/leagues/NBA_{season}_games-october.html"
+    return f"{SITE_ROOT}/wnba/years/{season}_games.html"
+
+
+def parse_month_links(html):
+    """Returns the set of month schedule page URLs linked from a schedule page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    # Select all 'a' (anchor) tags whose 'href' attribute contains '_games-' (indicates a month link)
+    return {f"{SITE_ROOT}{a['href']}" for a in soup.select('a[href*="_games-"]')}
+
+
+def parse_game_links(html):
+    """Returns the set of box-score URLs listed on a schedule page."""
+    return parse_schedule_page(html)[0]
+
+
+def parse_schedule_page(html):
+    """
+    Reads a schedule page.
+
+    Returns:
+        tuple: (game_links, unplayed_games) where game_links is the set of box-score URLs and
+               unplayed_games counts the scheduled games that have no box score yet.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    # Box score links sit in the 'td' cells whose 'data-stat' attribute is 'box_score_text',
+    # games that have not been played yet have the cell but no link
+    cells = soup.select("td[data-stat='box_score_text']")
+    game_links = {f"{SITE_ROOT}{cell.a['href']}" for cell in cells if cell.a is not None}
+    return game_links, sum(1 for cell in cells if cell.a is None)
+
+
+async def discover_game_urls(league, season, fetcher, index=None):
+    """
+    Discovers every box-score URL of a season, fetching the schedule pages that can still change concurrently.
+
+    Args:
+        league (str): "NBA" or "WNBA".
+        season (int): Season year, e.g. 2024 for the 2023-24 NBA season.
+        fetcher (fetch_engine.Fetcher): Open fetcher whose budget the requests count against.
+        index (ScheduleIndex): Index remembering earlier runs. Without one every page is fetched.
+
+    Returns:
+        list: Sorted box-score URLs.
+    """
+    index = index or ScheduleIndex(":memory:")
+    start_url = schedule_start_url(league, season)
+    # Registered before its first fetch, so it is judged by the season end rather than its month.
+    index.add_pages(league, season, [], start_url=start_url)
+    attempted = set()
+    refreshed = 0
+
+    async def refresh(page_url):
+        nonlocal refreshed
+        # Schedule pages change while a season is running, so they bypass the HTML cache.
+        html = await fetcher.fetch(page_url, use_cache=False)
+        game_links, unplayed_games = parse_schedule_page(html)
+        index.record_page(league, season, page_url, game_links, unplayed_games)
+        # NBA seasons link one page per month from every schedule page (new months such as the
+        # playoffs show up while the season runs), WNBA seasons have everything on one page.
+        if league == "NBA":
+            index.add_pages(league, season, parse_month_links(html))
+        refreshed += 1
+
+    # Month links found on one round of pages are fetched in the next, until nothing new turns up.
+    while True:
+        pages = [url for url in index.pages_to_refresh(league, season) if url not in attempted]
+        if not pages:
+            break
+        attempted.update(pages)
+        results = await asyncio.gather(*(refresh(url) for url in pages), return_exceptions=True)
+        for url, result in zip(pages, results):
+            if isinstance(result, Exception):
+                if url == start_url:
+                    raise result
+                print(f"Could not load month page {url}: {result}")
+    print(f"{league} {season}: refreshed {refreshed} schedule page(s), the rest are final.")
+
+    return index.game_urls(league, season)
+
+
+def discover_season(league, season, index_path=SCHEDULE_INDEX_FILE, **fetch_options):
+    """
+    Runs discover_game_urls() for a script without its own event loop, using the schedule index
+    at index_path. fetch_options go to the Fetcher (cache, cache_only, per_minute, ...).
+    """
+    from fetch_engine import Fetcher
+
+    async def discover():
+        async with Fetcher(**fetch_options) as fetcher:
+            return await discover_game_urls(league, season, fetcher, index)
+
+    index = ScheduleIndex(index_path)
+    try:
+        return asyncio.run(discover())
+    finally:
+        index.close()
@@ -0,0 +1,112 @@
+# ===================================================================
+# Schedule Index
+# ===================================================================
+# Remembers, between runs, which schedule pages each season has,
+# which of them are final, and every game URL found on them with its
+# date. A page is final once its month (or, for the single WNBA
+# season page, its season) is over and every game on it has a box
+# score. A season's start page lists the month pages, which keep
+# being added until the playoffs end, so it only becomes final once
+# the whole season is over. Discovery then only refetches the pages that can still
+# change, so a nightly refresh touches a handful of pages instead of
+# the whole schedule.
+# ===================================================================
+
+import calendar
+import datetime
+import sqlite3
+
+# --- Configuration, change as needed ---
+SCHEDULE_INDEX_FILE = "schedule_index.sqlite"
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+
+
+def page_end_date(league, season, page_url):
+    """
+    Last day a schedule page can still gain games: the end of its month for NBA month pages
+    (October-December belong to the year before the season year), the end of the year otherwise.
+    """
+    month_name = page_url.rsplit("_games-", 1)[-1].removesuffix(".html") if "_games-" in page_url else None
+    if league != "NBA" or month_name not in MONTHS:
+        return datetime.date(season, 12, 31)
+    month = MONTHS[month_name]
+    year = season - 1 if month >= 10 else season
+    return datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+def season_end_date(league, season):
+    """Last day a season can still gain games or schedule pages (the NBA Finals end in June)."""
+    return datetime.date(season, 6, 30) if league == "NBA" else datetime.date(season, 12, 31)
+
+
+class ScheduleIndex:
+    """SQLite index of schedule pages (with their final flag) and the game URLs found on them."""
+
+    def __init__(self, path=SCHEDULE_INDEX_FILE):
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_url TEXT PRIMARY KEY, league TEXT NOT NULL, season INTEGER NOT NULL,
+                is_start INTEGER NOT NULL DEFAULT 0, is_final INTEGER NOT NULL DEFAULT 0, fetched_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS games (
+                game_url TEXT PRIMARY KEY, league TEXT NOT NULL, season INTEGER NOT NULL,
+                game_date TEXT, page_url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS games_by_season ON games (league, season, game_date);
+        """)
+
+    def add_pages(self, league, season, page_urls, start_url=None, today=None):
+        """
+        Registers schedule pages (e.g. the month links found on a schedule page) without touching known
+        ones. The start page is reopened if an older index marked it final before the season ended.
+        """
+        season_over = season_end_date(league, season) < (today or datetime.date.today())
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO pages (page_url, league, season) VALUES (?, ?, ?)",
+                                [(url, league, season) for url in page_urls])
+            if start_url:
+                self.db.execute("INSERT OR IGNORE INTO pages (page_url, league, season) VALUES (?, ?, ?)",
+                                (start_url, league, season))
+                self.db.execute("UPDATE pages SET is_start = 1, is_final = is_final AND ? WHERE page_url = ?",
+                                (int(season_over), start_url))
+
+    def record_page(self, league, season, page_url, game_urls, unplayed_games, today=None):
+        """
+        Stores the games found on a freshly fetched schedule page and works out whether the page is final.
+        Returns True if it is.
+        """
+        today = today or datetime.date.today()
+        row = self.db.execute("SELECT is_start FROM pages WHERE page_url = ?", (page_url,)).fetchone()
+        end_date = season_end_date(league, season) if row and row[0] else page_end_date(league, season, page_url)
+        is_final = unplayed_games == 0 and end_date < today
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO pages (page_url, league, season) VALUES (?, ?, ?)",
+                            (page_url, league, season))
+            self.db.execute("UPDATE pages SET is_final = ?, fetched_at = ? WHERE page_url = ?",
+                            (int(is_final), today.isoformat(), page_url))
+            # boxscores/YYYYMMDD... -> YYYY-MM-DD
+            self.db.executemany(
+                "INSERT OR REPLACE INTO games (game_url, league, season, game_date, page_url) VALUES (?, ?, ?, ?, ?)",
+                [(url, league, season, f"{url[-17:-13]}-{url[-13:-11]}-{url[-11:-9]}", page_url) for url in game_urls])
+        return is_final
+
+    def pages_to_refresh(self, league, season):
+        """Schedule pages of a season that are not final yet, i.e. the ones worth refetching."""
+        rows = self.db.execute("SELECT page_url FROM pages WHERE league = ? AND season = ? AND is_final = 0 "
+                               "ORDER BY page_url", (league, season))
+        return [row[0] for row in rows]
+
+    def game_urls(self, league, season, since=None):
+        """Sorted game URLs of a season, optionally only those played on or after `since` (YYYY-MM-DD)."""
+        query = "SELECT game_url FROM games WHERE league = ? AND season = ?"
+        params = [league, season]
+        if since:
+            query += " AND game_date >= ?"
+            params.append(since)
+        return sorted(row[0] for row in self.db.execute(query, params))
+
+    def close(self):
+        self.db.close()
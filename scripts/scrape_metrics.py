@@ -0,0 +1,266 @@
+# ===================================================================
+# Scrape Metrics
+# ===================================================================
+# Low-overhead instrumentation for the scrape pipeline. Every stage
+# (budget wait, HTTP request, driver.get, waiting for the line score,
+# page_source, parsing, the polite sleep, cache and checkpoint writes,
+# ...) is timed with `with METRICS.stage("name", url):` into a
+# fixed-bucket latency histogram, so recording costs two
+# perf_counter() calls and a bisect, however long the run. Failures
+# and retries are counted by class, finished games are counted per
+# THROUGHPUT_INTERVAL to show throughput over the run, and the
+# slowest URLs of every stage are kept.
+#
+# Stage times are wall-clock times. Stages of the HTTP engine run
+# concurrently, so their totals can add up to more than the run took.
+# Driver pool workers run in other processes. They forward their
+# samples with every result, and the pool merges them into METRICS.
+#
+# At the end of a run the scrapers print summary() and write
+# <name>.json and <name>.prom (Prometheus text format) with write().
+#
+# Usage: python scrape_metrics.py nba_scrape_metrics_2025.json
+# ===================================================================
+
+import argparse
+import heapq
+import json
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# --- Configuration, change as needed ---
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60) # Seconds
+THROUGHPUT_INTERVAL = 60 # Seconds per throughput bin
+SLOWEST_URLS = 5 # Slowest URLs kept per stage
+
+
+class Histogram:
+    """Counts of observations per latency bucket, plus their count, sum and maximum."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last bin is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the maximum for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class StageTimer:
+    """Context manager returned by ScrapeMetrics.stage()."""
+
+    __slots__ = ("metrics", "name", "url", "start")
+
+    def __init__(self, metrics, name, url):
+        self.metrics = metrics
+        self.name = name
+        self.url = url
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, self.url)
+        return False
+
+
+class ScrapeMetrics:
+    """
+    Stage timings, counters and throughput of one scrape run.
+
+    Attributes:
+        stages (dict): Stage name -> Histogram of its durations.
+        slowest (dict): Stage name -> min-heap of the SLOWEST_URLS slowest (seconds, url) pairs.
+        counters (Counter): (counter name, label) -> count, e.g. ("failures", "timeout").
+        games (int): Games scraped.
+        throughput (Counter): THROUGHPUT_INTERVAL bin since the start -> games finished in it.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, interval=THROUGHPUT_INTERVAL):
+        self.buckets = buckets
+        self.interval = interval
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.slowest = {}
+        self.counters = Counter()
+        self.games = 0
+        self.throughput = Counter()
+        self._forwarded = None
+
+    def stage(self, name, url=None):
+        """Times a `with` block as stage `name`; pass the page URL to keep track of the slowest ones."""
+        return StageTimer(self, name, url)
+
+    def observe(self, name, seconds, url=None):
+        """Records one duration of stage `name`."""
+        if self._forwarded is not None:
+            self._forwarded.append((name, seconds, url))
+            return
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        if url is not None:
+            slowest = self.slowest.setdefault(name, [])
+            if len(slowest) < SLOWEST_URLS:
+                heapq.heappush(slowest, (seconds, url))
+            elif seconds > slowest[0][0]:
+                heapq.heapreplace(slowest, (seconds, url))
+
+    def count(self, name, label=""):
+        """Adds one to a counter, e.g. count("failures", "timeout") or count("http_retries", "HTTP 429")."""
+        self.counters[(name, label)] += 1
+
+    def count_game(self):
+        """Records one scraped game for the games total and the throughput bins."""
+        self.games += 1
+        self.throughput[int((time.perf_counter() - self._start) // self.interval)] += 1
+
+    def forward(self):
+        """
+        Collects stage samples for take_forwarded() instead of recording them, for driver pool
+        workers whose samples are merged in the parent process.
+        """
+        self._forwarded = []
+
+    def take_forwarded(self):
+        """Returns the samples collected since the last call (None when not forwarding)."""
+        if self._forwarded is None:
+            return None
+        samples, self._forwarded = self._forwarded, []
+        return samples
+
+    def merge(self, samples):
+        """Records (stage, seconds, url) samples forwarded by another process."""
+        for name, seconds, url in samples or ():
+            self.observe(name, seconds, url)
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def to_dict(self):
+        """Everything recorded so far as plain JSON-serializable data."""
+        elapsed = self.elapsed()
+        bins = range(int(elapsed // self.interval) + 1)
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "elapsed_seconds": round(elapsed, 3),
+            "games": self.games,
+            "games_per_minute": round(self.games / elapsed * 60, 2) if elapsed else 0.0,
+            "throughput": {"interval_seconds": self.interval, "games": [self.throughput[i] for i in bins]},
+            "stages": {
+                name: {
+                    "count": histogram.count,
+                    "sum_seconds": round(histogram.sum, 6),
+                    "max_seconds": round(histogram.max, 6),
+                    "p50_seconds": histogram.quantile(0.5),
+                    "p95_seconds": histogram.quantile(0.95),
+                    "buckets": {str(bound): count for bound, count in
+                                zip(list(self.buckets) + ["+Inf"], histogram.counts)},
+                    "slowest": [{"url": url, "seconds": round(seconds, 3)}
+                                for seconds, url in sorted(self.slowest.get(name, []), reverse=True)],
+                }
+                for name, histogram in self.stages.items()
+            },
+            "counters": {f"{name}:{label}" if label else name: count
+                         for (name, label), count in sorted(self.counters.items())},
+        }
+
+    def to_prometheus(self):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE scrape_stage_seconds histogram",
+        ]
+        for name, histogram in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'scrape_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'scrape_stage_seconds_sum{{stage="{name}"}} {histogram.sum:.6f}')
+            lines.append(f'scrape_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+        for counter in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE scrape_{counter}_total counter")
+            for (name, label), count in sorted(self.counters.items()):
+                if name == counter:
+                    labels = f'{{class="{label}"}}' if label else ""
+                    lines.append(f"scrape_{counter}_total{labels} {count}")
+        lines += [
+            "# TYPE scrape_games_total counter",
+            f"scrape_games_total {self.games}",
+            "# TYPE scrape_elapsed_seconds gauge",
+            f"scrape_elapsed_seconds {self.elapsed():.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Stage table (largest total time first), counters and the slowest URLs, as text."""
+        return format_summary(self.to_dict())
+
+    def write(self, basename):
+        """Writes <basename>.json and <basename>.prom and returns their paths."""
+        paths = (f"{basename}.json", f"{basename}.prom")
+        with open(paths[0], "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(paths[1], "w") as f:
+            f.write(self.to_prometheus())
+        return paths
+
+
+def format_summary(report):
+    """Formats a to_dict() report (e.g. loaded from a metrics .json file) for printing."""
+    lines = [f"--- Scrape metrics: {report['games']} games in {report['elapsed_seconds']:.1f}s "
+             f"({report['games_per_minute']:.1f} games/min) ---",
+             f"{'Stage':<18}{'Count':>8}{'Total s':>10}{'Mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'Max ms':>10}"]
+    stages = sorted(report["stages"].items(), key=lambda item: item[1]["sum_seconds"], reverse=True)
+    for name, stage in stages:
+        mean = stage["sum_seconds"] / stage["count"] if stage["count"] else 0.0
+        lines.append(f"{name:<18}{stage['count']:>8}{stage['sum_seconds']:>10.1f}{mean * 1000:>10.1f}"
+                     f"{stage['p50_seconds'] * 1000:>10.1f}{stage['p95_seconds'] * 1000:>10.1f}"
+                     f"{stage['max_seconds'] * 1000:>10.1f}")
+    if report["counters"]:
+        lines.append("Counters: " + ", ".join(f"{name} {count}" for name, count in report["counters"].items()))
+    games = report["throughput"]["games"]
+    if len(games) > 1:
+        lines.append(f"Games per {report['throughput']['interval_seconds']}s: " + " ".join(map(str, games)))
+    for name, stage in stages:
+        if stage["slowest"]:
+            slowest = ", ".join(f"{entry['url']} ({entry['seconds']:.1f}s)" for entry in stage["slowest"][:3])
+            lines.append(f"Slowest {name}: {slowest}")
+    return "\n".join(lines)
+
+
+# Shared by everything in the process, like the default registry of a metrics client.
+METRICS = ScrapeMetrics()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print the summary of a scrape metrics file.")
+    parser.add_argument("metrics_file", help="<name>.json written at the end of a scrape")
+    args = parser.parse_args()
+
+    with open(args.metrics_file) as f:
+        print(format_summary(json.load(f)))
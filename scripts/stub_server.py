@@ -0,0 +1,106 @@
+# ===================================================================
+# Local Stub Site
+# ===================================================================
+# Serves a folder of saved basketball-reference.com pages over HTTP
+# so the scrapers can be run and timed without touching the real
+# site. A page saved as <root>/boxscores/202312290ATL.html is served
+# at http://127.0.0.1:<port>/boxscores/202312290ATL.html.
+# It can also play a throttling site: past a request rate it answers
+# 429 with a Retry-After header, and a share of requests can fail
+# with 503, so the rate limiter and retry queue can be exercised.
+# ===================================================================
+
+import os
+import random
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ThrottleBucket:
+    """Token bucket refilled at `per_minute`, holding at most `burst` tokens. Shared by all handler threads."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Returns True if the request is within the rate, False if it should be throttled."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.rejected += 1
+            return False
+
+
+class StubPageHandler(SimpleHTTPRequestHandler):
+    """Serves saved pages with an optional artificial delay, throttling and errors, and no request logging."""
+
+    latency = 0
+    throttle = None # ThrottleBucket, or None to never throttle
+    error_rate = 0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.throttle is not None and not self.throttle.take():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_error(503)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(root, port=0, latency=0, throttle_per_minute=0, burst=5, error_rate=0):
+    """
+    Starts the stub site in a background thread.
+
+    Args:
+        root (str): Folder of saved pages laid out like the site's URL paths.
+        port (int): Port to listen on, 0 picks a free one.
+        latency (float): Seconds to wait before answering each request.
+        throttle_per_minute (float): Answer 429 to requests beyond this rate, 0 never throttles.
+        burst (int): Requests allowed back to back before the throttle rate applies.
+        error_rate (float): Share of requests (0-1) answered with a 503.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() when done. server.throttle holds the
+               ThrottleBucket (or None), whose `rejected` counts the 429s sent.
+    """
+    throttle = ThrottleBucket(throttle_per_minute, burst) if throttle_per_minute else None
+    handler = type("Handler", (StubPageHandler,),
+                   {"latency": latency, "throttle": throttle, "error_rate": error_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory=os.path.abspath(root)))
+    server.throttle = throttle
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    # Usage: python stub_server.py <saved_pages_folder> [port] [throttle_per_minute]
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    throttle_per_minute = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    server, base_url = start_stub_server(root, port, throttle_per_minute=throttle_per_minute)
+    print(f"Serving {root} at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()